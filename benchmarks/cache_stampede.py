@@ -0,0 +1,90 @@
+"""
+Database loads per cache expiry under concurrent reads of one hot order.
+
+Simulates several API processes (each with its own L1 tier and request
+coalescing) sharing the local Redis. After the order's key expires, all
+of them read it concurrently. The naive path loads on every miss,
+get_or_load should load once.
+
+Usage:
+    python -m benchmarks.cache_stampede --processes 4 --readers 200
+"""
+import argparse
+import asyncio
+import uuid
+from decimal import Decimal
+from redis.asyncio import from_url
+from src.cache.backend import TwoTierBackend
+from src.cache.orders import OrderCache, order_cache_key
+from src.core.config import settings
+from src.core.encoding import encode_order
+from src.db.models.order import Order, utcnow
+from src.schemas.order import OrderStatus
+
+
+def make_cache(redis) -> OrderCache:
+    backend = TwoTierBackend(
+        redis,
+        maxsize=settings.CACHE_L1_MAXSIZE,
+        ttl=settings.CACHE_L1_TTL,
+        max_item_bytes=settings.CACHE_L1_MAX_ITEM_BYTES,
+        channel=settings.CACHE_INVALIDATION_CHANNEL,
+    )
+    return OrderCache(
+        ttl=settings.ORDER_CACHE_TTL,
+        xfetch_beta=settings.ORDER_CACHE_XFETCH_BETA,
+        lock_ttl=settings.ORDER_CACHE_LOCK_TTL,
+        lock_wait=settings.ORDER_CACHE_LOCK_WAIT,
+        backend=backend,
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=200, help="concurrent reads per process")
+    parser.add_argument("--db-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    order = encode_order(
+        Order(
+            id=uuid.uuid4(),
+            user_id=1,
+            items=[{"sku": "HOT", "name": "hot", "quantity": 1, "price": "1.00"}],
+            total_price=Decimal("1.00"),
+            status=OrderStatus.PENDING,
+            created_at=utcnow(),
+        )
+    )
+    loads = 0
+
+    async def loader():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(args.db_latency)
+        return order
+
+    redis = from_url(settings.FASTAPI_CACHE_REDIS_URL)
+    caches = [make_cache(redis) for _ in range(args.processes)]
+    key = order_cache_key(order.id)
+
+    async def naive(cache: OrderCache):
+        result = await cache.get(order.id)
+        if result is None:
+            result = await loader()
+            await cache.set(result)
+
+    for name, read in (("naive", naive), ("get_or_load", lambda cache: cache.get_or_load(order.id, loader))):
+        await redis.delete(key)
+        for cache in caches:
+            cache.backend.l1.clear()
+        loads = 0
+        await asyncio.gather(*(read(cache) for cache in caches for _ in range(args.readers)))
+        print(f"{name:12} {loads:5} DB loads for {args.processes * args.readers} concurrent reads")
+
+    await redis.delete(key)
+    await redis.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
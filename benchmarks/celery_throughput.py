@@ -0,0 +1,43 @@
+"""
+Order processing throughput of the Celery worker.
+
+Publishes orders either as one process_order task each or as process_orders_batch
+tasks and reports orders per second until all results are in.
+
+Start a worker against the local Redis first, e.g.:
+    python -m celery -A src.celery_app.worker worker --pool threads --concurrency 8
+then run:
+    python -m benchmarks.celery_throughput --orders 2000 --mode batch
+"""
+import argparse
+import time
+import uuid
+from celery import group
+from src.celery_app.worker import process_order_task, process_orders_batch_task
+from src.core.config import settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--mode", choices=["single", "batch"], default="batch")
+    parser.add_argument("--batch-size", type=int, default=settings.ORDER_BATCH_SIZE)
+    args = parser.parse_args()
+
+    order_ids = [str(uuid.uuid4()) for _ in range(args.orders)]
+    if args.mode == "single":
+        tasks = group(process_order_task.s(order_id=order_id) for order_id in order_ids)
+    else:
+        size = args.batch_size
+        tasks = group(
+            process_orders_batch_task.s(order_ids[i:i + size])
+            for i in range(0, len(order_ids), size)
+        )
+    start = time.perf_counter()
+    tasks.apply_async().get(timeout=3600, disable_sync_subtasks=False)
+    elapsed = time.perf_counter() - start
+    print(f"{args.mode}: {args.orders} orders in {elapsed:.2f}s, {args.orders / elapsed:.1f} orders/s")
+
+
+if __name__ == "__main__":
+    main()
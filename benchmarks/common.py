@@ -0,0 +1,43 @@
+"Shared helpers for benchmarks that drive the FastAPI app in-process"
+import contextlib
+import statistics
+import uuid
+from httpx import ASGITransport, AsyncClient
+
+
+@contextlib.asynccontextmanager
+async def app_client():
+    "AsyncClient bound to the app with its lifespan running and rate limiting disabled"
+    from src.main import app
+    from src.core.limiter import limiter
+
+    limiter.enabled = False
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            yield client
+
+
+async def register_and_login(client: AsyncClient, password: str = "benchmark-password") -> dict:
+    "Register a fresh user and return its credentials and auth headers"
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    response = await client.post("/register/", json={"email": email, "password": password})
+    response.raise_for_status()
+    user = response.json()
+    response = await client.post("/token/", data={"username": email, "password": password})
+    response.raise_for_status()
+    token = response.json()["access_token"]
+    return {
+        "id": user["id"],
+        "email": email,
+        "password": password,
+        "headers": {"Authorization": f"Bearer {token}"},
+    }
+
+
+def percentiles(samples: list[float]) -> dict:
+    "p50/p95/p99 in milliseconds for latency samples given in seconds"
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49] * 1000, "p95": cuts[94] * 1000, "p99": cuts[98] * 1000}
@@ -0,0 +1,170 @@
+"""
+Load test of the order API with per-endpoint latency percentiles and throughput.
+
+Drives the FastAPI app in-process (lifespan included, rate limiting off) against
+the Postgres and Redis configured in .env, so local containers stand in for the
+real services. Results are written as JSON for comparison between commits.
+
+Usage:
+    python -m benchmarks.load_api --requests 500 --concurrency 20
+    python -m benchmarks.load_api --compare benchmarks/results/<old>.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+from fastapi_cache import FastAPICache
+from httpx import Response
+from benchmarks.common import app_client, percentiles, register_and_login
+from src.cache.orders import order_cache_key
+
+RESULTS_DIR = Path(__file__).parent / "results"
+ORDER = {
+    "items": [
+        {"sku": "XBOX-S", "name": "xbox", "quantity": 2, "price": "15.50"},
+        {"sku": "PS5", "name": "ps5", "quantity": 1, "price": "42.00"},
+    ],
+}
+
+
+async def measure(calls: list[Callable[[], Awaitable[Response]]], concurrency: int) -> tuple[dict, list[Response]]:
+    "Run calls with bounded concurrency and summarize their latencies"
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+    errors = 0
+
+    async def timed(call):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await call()
+            samples.append(time.perf_counter() - start)
+            if response.is_error:
+                errors += 1
+            return response
+
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(timed(call) for call in calls))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(calls),
+        "errors": errors,
+        "rps": len(calls) / elapsed if elapsed else 0.0,
+        **percentiles(samples),
+    }, responses
+
+
+async def drop_cached_orders(order_ids: list[str]):
+    "Delete the cached copies of orders from Redis and the L1 of this process"
+    backend = FastAPICache.get_backend()
+    keys = [order_cache_key(order_id) for order_id in order_ids]
+    for key in keys:
+        backend.l1.pop(key)
+    if keys:
+        await backend.redis.delete(*keys)
+
+
+async def run(requests: int, concurrency: int) -> dict:
+    results = {}
+    async with app_client() as client:
+        password = "benchmark-password"
+        emails = [f"load-{uuid.uuid4().hex[:12]}@example.com" for _ in range(requests)]
+        results["register"], _ = await measure(
+            [lambda email=email: client.post("/register/", json={"email": email, "password": password})
+             for email in emails],
+            concurrency,
+        )
+        results["token"], _ = await measure(
+            [lambda email=email: client.post("/token/", data={"username": email, "password": password})
+             for email in emails],
+            concurrency,
+        )
+        user = await register_and_login(client)
+        headers = user["headers"]
+        results["create_order"], responses = await measure(
+            [lambda: client.post("/orders/", json=ORDER, headers=headers) for _ in range(requests)],
+            concurrency,
+        )
+        order_ids = [response.json()["id"] for response in responses if response.status_code == 201]
+        read = [lambda order_id=order_id: client.get(f"/orders/{order_id}/", headers=headers)
+                for order_id in order_ids]
+        # create_order wrote the orders through to the cache
+        await drop_cached_orders(order_ids)
+        results["get_order_cold"], _ = await measure(read, concurrency)
+        results["get_order_cached"], _ = await measure(read, concurrency)
+        results["patch_order"], _ = await measure(
+            [lambda order_id=order_id: client.patch(f"/orders/{order_id}/", json={"status": "PAID"}, headers=headers)
+             for order_id in order_ids],
+            concurrency,
+        )
+        results["list_orders"], _ = await measure(
+            [lambda: client.get(f"/orders/user/{user['id']}", headers=headers) for _ in range(requests)],
+            concurrency,
+        )
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    "Print p95/RPS changes per endpoint and return whether any p95 regressed past threshold"
+    regressed = False
+    for name, stats in current["endpoints"].items():
+        old = baseline["endpoints"].get(name)
+        if old is None:
+            continue
+        p95_change = stats["p95"] / old["p95"] - 1 if old["p95"] else 0.0
+        rps_change = stats["rps"] / old["rps"] - 1 if old["rps"] else 0.0
+        flag = p95_change > threshold
+        regressed = regressed or flag
+        print(f"{'REGRESSION ' if flag else ''}{name:18} p95 {p95_change:+7.1%}  rps {rps_change:+7.1%}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--output", type=Path, help="result file, defaults to benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", type=Path, help="baseline result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative p95 increase")
+    args = parser.parse_args()
+
+    endpoints = asyncio.run(run(args.requests, args.concurrency))
+    commit = git_commit()
+    result = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "endpoints": endpoints,
+    }
+    for name, stats in endpoints.items():
+        print(
+            f"{name:18} {stats['rps']:9.1f} req/s  p50={stats['p50']:7.2f}ms "
+            f"p95={stats['p95']:7.2f}ms p99={stats['p99']:7.2f}ms errors={stats['errors']}"
+        )
+    output = args.output or RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"results written to {output}")
+
+    if args.compare and compare(json.loads(args.compare.read_text()), result, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Read latency with and without a concurrent burst of logins.
+
+bcrypt runs in the hashing process pool and logins return their database
+connection before queueing for it, so reads should keep roughly the same
+latency while /token/ is being hammered. The order read is served from the
+cache, the listing needs a connection from the pool.
+
+Usage (against local Postgres/Redis with migrations applied):
+    python -m benchmarks.login_storm --logins 200 --reads 500
+"""
+import argparse
+import asyncio
+import time
+from benchmarks.common import app_client, percentiles, register_and_login
+from src.core.security import hashing_pool
+
+
+async def read(client, user, path, count) -> list[float]:
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get(path, headers=user["headers"])
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def login_storm(client, user, count, concurrency) -> int:
+    "Fire count logins and return the deepest hashing queue seen meanwhile"
+    semaphore = asyncio.Semaphore(concurrency)
+    max_queue = 0
+
+    async def login():
+        async with semaphore:
+            response = await client.post(
+                "/token/", data={"username": user["email"], "password": user["password"]}
+            )
+            response.raise_for_status()
+
+    async def watch_queue():
+        nonlocal max_queue
+        while True:
+            max_queue = max(max_queue, hashing_pool.queued)
+            await asyncio.sleep(0.005)
+
+    watcher = asyncio.create_task(watch_queue())
+    await asyncio.gather(*(login() for _ in range(count)))
+    watcher.cancel()
+    return max_queue
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--reads", type=int, default=500)
+    args = parser.parse_args()
+
+    async with app_client() as client:
+        user = await register_and_login(client)
+        response = await client.post(
+            "/orders/",
+            json={"items": [{"sku": "BENCH", "name": "bench", "quantity": 1, "price": "1.00"}]},
+            headers=user["headers"],
+        )
+        response.raise_for_status()
+        paths = {
+            "order": f"/orders/{response.json()['id']}/",
+            "listing": f"/orders/user/{user['id']}?limit=10",
+        }
+
+        idle = [await read(client, user, path, args.reads) for path in paths.values()]
+        max_queue, *busy = await asyncio.gather(
+            login_storm(client, user, args.logins, args.login_concurrency),
+            *(read(client, user, path, args.reads) for path in paths.values()),
+        )
+
+    for name, runs in (("idle", idle), ("login storm", busy)):
+        for path_name, samples in zip(paths, runs):
+            stats = percentiles(samples)
+            print(
+                f"{name:12} {path_name:8} p50={stats['p50']:7.2f}ms p95={stats['p95']:7.2f}ms p99={stats['p99']:7.2f}ms"
+            )
+    print(f"max hashing queue depth: {max_queue}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Hot path cost of the metrics instrumentation.
+
+Times a no-op ASGI app with and without MetricsMiddleware, and SELECT 1 on an
+in-memory SQLite engine with and without the statement timing events. The
+difference per call is the overhead added to every request and every query.
+
+Usage:
+    python -m benchmarks.metrics_overhead --iterations 20000 --rounds 5
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+from sqlalchemy import create_engine, text
+from src.core.metrics import MetricsMiddleware, instrument_engine
+
+
+async def noop_app(scope, receive, send):
+    scope["route"] = SimpleNamespace(path="/orders/{order_id}/")
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def send(message):
+    pass
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def time_asgi(app, iterations: int, rounds: int) -> float:
+    "Best per-request time over rounds, after a warm-up round"
+    best = float("inf")
+    for _ in range(rounds + 1):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await app({"type": "http", "method": "GET", "path": "/orders/1/"}, receive, send)
+        best = min(best, (time.perf_counter() - started) / iterations)
+    return best
+
+
+def time_queries(instrumented: bool, iterations: int, rounds: int) -> float:
+    "Best per-query time over rounds, after a warm-up round"
+    engine = create_engine("sqlite://")
+    if instrumented:
+        instrument_engine(engine)
+    best = float("inf")
+    with engine.connect() as conn:
+        statement = text("SELECT 1")
+        for _ in range(rounds + 1):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                conn.execute(statement)
+            best = min(best, (time.perf_counter() - started) / iterations)
+    engine.dispose()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    bare = asyncio.run(time_asgi(noop_app, args.iterations, args.rounds))
+    instrumented = asyncio.run(time_asgi(MetricsMiddleware(noop_app), args.iterations, args.rounds))
+    print(f"request: {bare * 1e6:7.2f}us bare  {instrumented * 1e6:7.2f}us with middleware  "
+          f"+{(instrumented - bare) * 1e6:.2f}us")
+
+    bare = time_queries(False, args.iterations, args.rounds)
+    instrumented = time_queries(True, args.iterations, args.rounds)
+    print(f"query:   {bare * 1e6:7.2f}us bare  {instrumented * 1e6:7.2f}us with events      "
+          f"+{(instrumented - bare) * 1e6:.2f}us")
+
+
+if __name__ == "__main__":
+    main()
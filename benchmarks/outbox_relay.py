@@ -0,0 +1,73 @@
+"""
+Outbox relay throughput and lag against a local Kafka broker.
+
+Inserts a backlog of new-order events into order_outbox and drains it with
+relay_batch, reporting messages per second and the age of each batch's oldest
+event when it was acked.
+
+Usage (against local Postgres with migrations applied and the compose Kafka):
+    python -m benchmarks.outbox_relay --events 50000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from decimal import Decimal
+from sqlalchemy import insert
+from benchmarks.common import percentiles
+from src.core.config import settings
+from src.core.encoding import encode_order
+from src.db.models.order import Order, utcnow
+from src.db.models.outbox import OrderOutbox
+from src.db.session import SessionLocal, dispose_engine, init_engine
+from src.kafka.outbox import new_order_event_values, relay_batch
+from src.kafka.producer import shutdown_kafka
+from src.schemas.order import OrderStatus
+
+
+async def seed(events: int):
+    rows = []
+    for _ in range(events):
+        order = Order(
+            id=uuid.uuid4(),
+            user_id=1,
+            items=[{"sku": "BENCH", "name": "bench", "quantity": 1, "price": "1.00"}],
+            total_price=Decimal("1.00"),
+            status=OrderStatus.PENDING,
+            created_at=utcnow(),
+        )
+        rows.append(new_order_event_values(encode_order(order)))
+    async with SessionLocal() as session:
+        await session.execute(insert(OrderOutbox), rows)
+        await session.commit()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+    args = parser.parse_args()
+
+    init_engine()
+    await seed(args.events)
+    lags = []
+    relayed = 0
+    start = time.perf_counter()
+    while relayed < args.events:
+        async with SessionLocal() as session:
+            count, lag = await relay_batch(session, args.batch_size)
+        if not count:
+            break
+        relayed += count
+        lags.append(lag)
+    elapsed = time.perf_counter() - start
+    shutdown_kafka()
+    await dispose_engine()
+
+    stats = percentiles(lags)
+    print(f"relayed {relayed} events in {elapsed:.2f}s: {relayed / elapsed:.1f} msg/s")
+    print(f"batch lag p50={stats['p50']:.1f}ms p95={stats['p95']:.1f}ms p99={stats['p99']:.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
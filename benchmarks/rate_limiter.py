@@ -0,0 +1,71 @@
+"""
+Latency of a rate limit decision and Redis round trips per request.
+
+Runs concurrent clients against the local Redis with the limiter in exact
+mode (one round trip per request) and with local batches. Buckets are sized
+so that most requests are allowed; --clients distinct keys spread the load
+like distinct users.
+
+Usage:
+    python -m benchmarks.rate_limiter --requests 20000 --concurrency 50 --batches 1 10 50
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from benchmarks.common import percentiles
+from src.core.config import settings
+from src.core.limiter import TokenBucketLimiter
+from src.core.redis_pool import close_pools
+
+
+async def run(limiter: TokenBucketLimiter, args) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    samples = []
+    remaining = args.requests
+
+    async def client(worker: int):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            key = f"bench-{run_id}:{(worker + remaining) % args.clients}"
+            started = time.perf_counter()
+            await limiter.acquire(key, args.rate, args.burst)
+            samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(worker) for worker in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"rps": len(samples) / elapsed, **percentiles(samples), **limiter.stats()}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=100, help="distinct rate limit keys")
+    parser.add_argument("--rate", type=float, default=1000.0)
+    parser.add_argument("--burst", type=int, default=1000)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    for batch in args.batches:
+        limiter = TokenBucketLimiter(
+            settings.RATE_LIMIT_REDIS_URL,
+            local_batch=batch,
+            local_ttl=settings.RATE_LIMIT_LOCAL_TTL,
+            local_maxsize=settings.RATE_LIMIT_LOCAL_MAXSIZE,
+            prefix="ratelimit-bench",
+        )
+        result = await run(limiter, args)
+        await limiter.close()
+        print(
+            f"batch {batch:4}: {result['rps']:9.0f} rps  p50 {result['p50']:.3f}ms  "
+            f"p99 {result['p99']:.3f}ms  {result['round_trips'] / args.requests:.2f} round trips/request  "
+            f"{result['rejected']} rejected"
+        )
+    await close_pools()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""
+Cost of serializing one order for the HTTP response, the Redis cache and Kafka.
+
+"pydantic" is the previous path: the ORM row is validated into OrderRead for the
+response, the cache entry and the Kafka payload and serialized for each of them.
+"orjson" encodes the row once and shares the bytes.
+
+Usage:
+    python -m benchmarks.serialization --items 10 100 1000
+"""
+import argparse
+import json
+import timeit
+import uuid
+from decimal import Decimal
+from src.core.encoding import encode_order
+from src.db.models.order import Order, utcnow
+from src.schemas.order import OrderRead, OrderStatus
+
+
+def make_order(items: int) -> Order:
+    return Order(
+        id=uuid.uuid4(),
+        user_id=1,
+        items=[{"name": f"item-{i}", "sku": f"SKU-{i:06}", "quantity": 1 + i % 5, "price": "9.99"} for i in range(items)],
+        total_price=sum(Decimal("9.99") * (1 + i % 5) for i in range(items)),
+        status=OrderStatus.PENDING,
+        created_at=utcnow(),
+    )
+
+
+def pydantic_path(order: Order):
+    response = OrderRead.model_validate(order)
+    response.model_dump_json()
+    OrderRead.model_validate(order).model_dump_json()
+    json.dumps(OrderRead.model_validate(order).model_dump(mode="json"))
+
+
+def orjson_path(order: Order):
+    encode_order(order)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    for items in args.items:
+        order = make_order(items)
+        timings = {
+            name: min(timeit.repeat(lambda: path(order), number=args.repeat, repeat=5)) / args.repeat
+            for name, path in (("pydantic", pydantic_path), ("orjson", orjson_path))
+        }
+        print(
+            f"{items:6} items: pydantic {timings['pydantic'] * 1e6:9.1f}us  "
+            f"orjson {timings['orjson'] * 1e6:9.1f}us  "
+            f"speedup {timings['pydantic'] / timings['orjson']:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
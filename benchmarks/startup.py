@@ -0,0 +1,93 @@
+"""
+Import time of the API and time to its first responses.
+
+Imports src.main in fresh interpreters, then starts `python -m src.server`
+with one worker and polls it: the time until it answers (its lifespan,
+including connection warm-up, has finished), the latency of the first and
+second login attempt (both fail, they only touch the database and the rate
+limiter) and how long a SIGTERM takes to drain it.
+
+Usage (against local Postgres/Redis with migrations applied):
+    python -m benchmarks.startup --imports 5
+"""
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import src.main; print(time.perf_counter() - t)"
+
+
+def import_time(runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return samples
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def timed_login(client: httpx.Client) -> float:
+    start = time.perf_counter()
+    client.post("/token/", data={"username": "startup@example.com", "password": "startup-password"})
+    return time.perf_counter() - start
+
+
+def serve_once(timeout: float) -> dict:
+    port = free_port()
+    env = dict(os.environ, API_WORKERS="1", API_HOST="127.0.0.1", API_PORT=str(port))
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.server"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while True:
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError(f"Server did not answer within {timeout}s")
+                try:
+                    client.get("/openapi.json")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.01)
+            ready = time.perf_counter() - start
+            first = timed_login(client)
+            second = timed_login(client)
+        stopping = time.perf_counter()
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout)
+        return {"ready": ready, "first": first, "second": second, "drain": time.perf_counter() - stopping}
+    finally:
+        if server.poll() is None:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--imports", type=int, default=5, help="fresh interpreters importing src.main")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    samples = import_time(args.imports)
+    print(f"import src.main:      min {min(samples) * 1000:8.1f}ms  median {statistics.median(samples) * 1000:8.1f}ms")
+    result = serve_once(args.timeout)
+    print(f"first response:       {result['ready'] * 1000:8.1f}ms after spawn")
+    print(f"first login request:  {result['first'] * 1000:8.1f}ms")
+    print(f"second login request: {result['second'] * 1000:8.1f}ms")
+    print(f"SIGTERM to exit:      {result['drain'] * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
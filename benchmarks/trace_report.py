@@ -0,0 +1,83 @@
+"""
+Per-stage and end-to-end latency percentiles of the order pipeline from exported spans.
+
+Run the services with TRACING_EXPORTER=file (and the same TRACING_DIR), create
+some orders, let them be processed and point this script at the directory.
+Every stage span carries the order id, so an order's end-to-end latency is
+measured from the start of its "outbox wait" span (the order's created_at)
+to the end of its "process order" span.
+
+Usage:
+    python -m benchmarks.trace_report --dir traces
+"""
+import argparse
+import glob
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from benchmarks.common import percentiles
+
+STAGES = [
+    "POST /orders/",
+    "outbox wait",
+    "produce new-orders",
+    "consume new-orders",
+    "dispatch orders",
+    "queue wait",
+    "process batch",
+    "process order",
+]
+
+
+def parse_time(value: str) -> float:
+    "Epoch seconds of a span timestamp written by the SDK JSON formatter"
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc).timestamp()
+
+
+def load_spans(directory: str) -> list[dict]:
+    spans = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.jsonl"))):
+        with open(path) as file:
+            for line in file:
+                if line.strip():
+                    spans.append(json.loads(line))
+    return spans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default="traces", help="TRACING_DIR of the services")
+    args = parser.parse_args()
+
+    durations = defaultdict(list)
+    orders = defaultdict(dict)
+    for span in load_spans(args.dir):
+        start, end = parse_time(span["start_time"]), parse_time(span["end_time"])
+        durations[span["name"]].append(end - start)
+        order_id = span["attributes"].get("order.id")
+        if order_id is None:
+            continue
+        if span["name"] == "outbox wait":
+            orders[order_id]["start"] = start
+        elif span["name"] == "process order":
+            orders[order_id]["end"] = end
+
+    names = STAGES + sorted(name for name in durations if name not in STAGES)
+    print(f"{'span':32} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name in names:
+        if name not in durations:
+            continue
+        stats = percentiles(durations[name])
+        print(f"{name:32} {len(durations[name]):7} {stats['p50']:10.2f} {stats['p95']:10.2f} {stats['p99']:10.2f}")
+
+    end_to_end = [order["end"] - order["start"] for order in orders.values() if "start" in order and "end" in order]
+    if end_to_end:
+        stats = percentiles(end_to_end)
+        print(f"\n{'end to end':32} {len(end_to_end):7} {stats['p50']:10.2f} {stats['p95']:10.2f} {stats['p99']:10.2f}")
+    else:
+        print("\nNo order has both its outbox wait and process order spans yet")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
+import time
 import logging
+import jwt
 from fastapi.security import OAuth2PasswordBearer
-from fastapi import Depends, HTTPException, status
-from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.cache.lru import TTLCache
 from src.core.config import settings
-from src.db.models.user import User
+from src.core.limiter import limiter, retry_after_header
+from src.core.security import user_by_email_query
+from src.core.tokens import decode_access_token
 from src.db.session import get_session
+from src.schemas.user import CurrentUser
 
 CredentialsException = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -15,23 +20,60 @@ CredentialsException = HTTPException(
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
 
-def get_current_user(
-    session: Session = Depends(get_session),
+# Verified tokens -> their user, so a token's signature is checked once per TTL
+user_cache = TTLCache(maxsize=settings.AUTH_CACHE_MAXSIZE, ttl=settings.AUTH_CACHE_TTL)
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),
     token: str = Depends(oauth2_scheme),
-) -> User:
-    "Get current user from token"
+) -> CurrentUser:
+    "Get current user from token claims"
+    user = user_cache.get(token)
+    if user is not None:
+        return user
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        email = payload.get("sub")
-        if email is None:
-            raise CredentialsException
-    except JWTError:
+        payload = decode_access_token(token)
+    except jwt.PyJWTError:
         logging.error("JWTError: Invalid token")
         raise CredentialsException
-    user = session.query(User).filter_by(email=email).first()
-    if not user:
-        logging.error("User not found")
-        raise CredentialsException
-    return user
\ No newline at end of file
+    if "uid" in payload:
+        # Signed claims need no validation, model_construct skips it
+        user = CurrentUser.model_construct(
+            id=payload["uid"], email=payload["sub"], roles=payload.get("roles", [])
+        )
+    else:
+        # Tokens issued before the user id and roles were embedded
+        db_user = (await session.scalars(user_by_email_query(payload["sub"]))).first()
+        if not db_user:
+            logging.error("User not found")
+            raise CredentialsException
+        user = CurrentUser.model_validate(db_user)
+    user_cache.set(token, user, ttl=payload["exp"] - time.time())
+    return user
+
+
+def rate_limit_key(request: Request) -> str:
+    "Limit by user for tokens already verified by get_current_user, by client IP otherwise"
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if token and scheme.lower() == "bearer":
+        # peek() keeps the auth cache counters about get_current_user only
+        user = user_cache.peek(token)
+        if user is not None:
+            return f"user:{user.id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+def rate_limit(scope: str, rate: float, burst: int):
+    "Dependency giving every client its own token bucket of burst tokens refilled at rate per second for scope"
+    async def check_rate_limit(request: Request):
+        retry_after = await limiter.acquire(f"{scope}:{rate_limit_key(request)}", rate, burst)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers=retry_after_header(retry_after),
+            )
+    return check_rate_limit
+
+auth_rate_limit = rate_limit("auth", settings.RATE_LIMIT_AUTH_RATE, settings.RATE_LIMIT_AUTH_BURST)
+read_rate_limit = rate_limit("read", settings.RATE_LIMIT_READ_RATE, settings.RATE_LIMIT_READ_BURST)
+write_rate_limit = rate_limit("write", settings.RATE_LIMIT_WRITE_RATE, settings.RATE_LIMIT_WRITE_BURST)
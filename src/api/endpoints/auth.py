@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from src.api.deps import get_session
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.api.deps import auth_rate_limit, get_session
 from src.db.models.user import User
-from src.core.security import get_hash, authenticate_user, create_access_token
+from src.core.security import get_hash_async, authenticate_user, create_access_token
 from src.schemas.user import UserCreate, UserRead
 from src.schemas.token import Token
 
@@ -14,6 +16,7 @@ auth_router = APIRouter()
     "/register/",
     status_code=status.HTTP_201_CREATED,
     response_model=UserRead,
+    dependencies=[Depends(auth_rate_limit)],
     summary="Register New User",
     description="Create a new user account with email and password.",
     responses={
@@ -21,20 +24,34 @@ auth_router = APIRouter()
         status.HTTP_400_BAD_REQUEST: {"description": "Email already registered"},
     },
 )
-async def register_user(user_in: UserCreate, session: Session = Depends(get_session)):
+async def register_user(user_in: UserCreate, session: AsyncSession = Depends(get_session)):
     "Register a new user"
-    if session.query(User).filter_by(email=user_in.email).first():
+    # Duplicates are rejected before spending a bcrypt run in the shared hashing pool
+    if await session.scalar(select(User.id).filter_by(email=user_in.email)) is not None:
         raise HTTPException(status_code=400, detail="Email already registered")
-    user = User(email=user_in.email, hashed_password=get_hash(user_in.password))
-    session.add(user)
-    session.commit()
-    session.refresh(user)
+    # Return the connection to the pool while bcrypt runs
+    await session.rollback()
+    hashed_password = await get_hash_async(user_in.password)
+    # The unique email index catches a concurrent registration of the same email
+    user = (
+        await session.scalars(
+            insert(User)
+            .values(email=user_in.email, hashed_password=hashed_password)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User)
+        )
+    ).first()
+    if not user:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    user = UserRead.model_validate(user)
+    await session.commit()
     return user
 
 
 @auth_router.post(
     "/token/",
     response_model=Token,
+    dependencies=[Depends(auth_rate_limit)],
     summary="Login and Obtain Access Token",
     description="Authenticate using email (as username) and password via OAuth2 Password Flow to get a JWT access token.",
     responses={
@@ -44,10 +61,10 @@ async def register_user(user_in: UserCreate, session: Session = Depends(get_sess
 )
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     "Login and get access token"
-    user = authenticate_user(
+    user = await authenticate_user(
         session=session, email=form_data.username, password=form_data.password
     )
     if not user:
@@ -56,5 +73,5 @@ async def login_for_access_token(
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_access_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
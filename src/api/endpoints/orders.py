@@ -1,34 +1,64 @@
 import uuid
-from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, status, HTTPException, Request
-from fastapi_cache.decorator import cache
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
-from src.db.models.order import Order
-from src.schemas.order import OrderBase, OrderRead, OrderUpdate
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List
+import orjson
+from opentelemetry import trace
+from pydantic import ValidationError
+from sqlalchemy import (
+    Date,
+    Select,
+    any_,
+    bindparam,
+    case,
+    cast,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Body, Depends, Query, status, HTTPException
+from fastapi.responses import StreamingResponse
+from src.cache.orders import order_cache
+from src.core.config import settings
+from src.core.encoding import EncodedOrder, dumps, encode_list, encode_order, order_values
+from src.core.tracing import inject_context
+from src.db.models.order import Order, as_utc, utcnow
+from src.db.models.outbox import OrderOutbox
+from src.db.session import SessionLocal
+from src.schemas.order import (
+    BulkOrderResult,
+    OrderBase,
+    OrderFilter,
+    OrderPage,
+    OrderRead,
+    OrderStats,
+    OrderStatus,
+    OrderStatusUpdate,
+    OrderUpdate,
+    SortOrder,
+)
 from src.schemas.user import UserRead
-from src.api.deps import get_session, get_current_user
-from src.kafka.producer import send_new_order_message
+from src.api.deps import get_session, get_current_user, read_rate_limit, write_rate_limit
+from src.api.pagination import decode_cursor, encode_cursor
+from src.api.responses import JSONBytesResponse
+from src.kafka.outbox import new_order_event, new_order_event_values
 
 order_router = APIRouter()
 
-CACHE_EXPIRING_TIME = 300
-
-
-def key_builder(
-    *args, namespace="", request: Request = None, order_id: str | None = None, **kwargs
-):
-    "Build cache key for order-related functions in namespase:id_order format"
-    order_id = order_id or request.url.path.split("/")[-2]
-    return f"{namespace}:{order_id}"
-
 
 @order_router.post(
     "/",
     response_model=OrderRead,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(write_rate_limit)],
     summary="Create a New Order",
-    description="Creates a new order for the currently authenticated user and publishes a 'new_order' event to Kafka.",
+    description="Creates a new order for the currently authenticated user and records a 'new_order' event in the outbox, which is relayed to Kafka.",
     responses={
         status.HTTP_201_CREATED: {"description": "Order created successfully"},
         status.HTTP_422_UNPROCESSABLE_ENTITY: {
@@ -38,38 +68,216 @@ def key_builder(
 )
 async def create_order(
     order_in: OrderBase,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: UserRead = Depends(get_current_user),
 ):
     "Create a new order"
-    order = Order(**order_in.model_dump(), user_id=current_user.id)
+    # Defaults are set client-side so the order is complete without a flush or refresh
+    order = Order(
+        **order_in.to_row(),
+        id=uuid.uuid4(),
+        user_id=current_user.id,
+        status=OrderStatus.PENDING,
+        created_at=utcnow(),
+    )
+    trace.get_current_span().set_attribute("order.id", str(order.id))
+    encoded = encode_order(order)
     session.add(order)
-    session.commit()
-    session.refresh(order)
-    await send_new_order_message(OrderRead.model_validate(order))
-    return order
+    session.add(new_order_event(encoded))
+    await session.commit()
+    await order_cache.set(encoded)
+    return JSONBytesResponse(encoded.body, status_code=status.HTTP_201_CREATED)
+
+
+@order_router.post(
+    "/bulk/",
+    response_model=list[BulkOrderResult],
+    dependencies=[Depends(write_rate_limit)],
+    summary="Create Orders in Bulk",
+    description=f"""Creates up to {settings.ORDERS_BULK_MAX_SIZE} orders for the currently authenticated user in one request.
+    Every item is validated on its own: valid items are inserted with a single statement, invalid ones are reported with their errors.
+    A 'new_order' event is recorded in the outbox for every created order.""",
+    responses={
+        status.HTTP_200_OK: {"description": "Per-item results, in request order"},
+    },
+)
+async def create_orders_bulk(
+    orders_in: List[Dict[str, Any]] = Body(
+        ..., min_length=1, max_length=settings.ORDERS_BULK_MAX_SIZE
+    ),
+    session: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_user),
+):
+    "Create many orders at once"
+    results = [{"index": index, "order": None, "errors": None} for index in range(len(orders_in))]
+    rows = []
+    created_at = utcnow()
+    for index, item in enumerate(orders_in):
+        try:
+            order_in = OrderBase.model_validate(item)
+        except ValidationError as e:
+            results[index]["errors"] = [
+                {"loc": error["loc"], "msg": error["msg"], "type": error["type"]}
+                for error in e.errors()
+            ]
+            continue
+        rows.append(
+            {
+                **order_in.to_row(),
+                "id": uuid.uuid4(),
+                "user_id": current_user.id,
+                "status": OrderStatus.PENDING,
+                "created_at": created_at,
+            }
+        )
+    if rows:
+        orders = (
+            await session.scalars(
+                insert(Order).returning(Order, sort_by_parameter_order=True), rows
+            )
+        ).all()
+        created = [encode_order(order) for order in orders]
+        trace_context = inject_context()
+        await session.execute(
+            insert(OrderOutbox),
+            [new_order_event_values(order, trace_context) for order in created],
+        )
+        await session.commit()
+        valid = (result for result in results if result["errors"] is None)
+        for result, order in zip(valid, created):
+            result["order"] = orjson.Fragment(order.body)
+    return JSONBytesResponse(dumps(results))
+
+
+def order_ids_param(order_ids: list[uuid.UUID]):
+    "Bind order ids as one array parameter, for id = ANY(:order_ids)"
+    return bindparam("order_ids", order_ids, type_=ARRAY(Order.id.type))
+
+
+def order_query(order_id: uuid.UUID) -> Select:
+    "An order by its id"
+    return select(Order).where(Order.id == order_id)
+
+
+def orders_by_ids_query(order_ids: list[uuid.UUID]) -> Select:
+    "Orders with the given ids, in any order"
+    return select(Order).where(Order.id == any_(order_ids_param(order_ids)))
+
+
+def order_owner_query(order_id: uuid.UUID) -> Select:
+    "Owner id of an order, without loading the order"
+    return select(Order.user_id).where(Order.id == order_id)
+
+
+@order_router.get(
+    "/",
+    response_model=list[OrderRead],
+    dependencies=[Depends(read_rate_limit)],
+    summary="Get Orders by IDs",
+    description=f"""Retrieves up to {settings.ORDERS_BATCH_GET_MAX_SIZE} orders by their UUIDs in one request.
+    Cached orders are read with a single Redis MGET, the rest with one database query.
+    Orders that do not exist or belong to another user are left out of the response.""",
+    responses={
+        status.HTTP_200_OK: {"description": "Found orders, in request order"},
+    },
+)
+async def get_orders_batch(
+    # Every id adds ~41 bytes to the query string, which proxies commonly cap at 8 KB
+    ids: List[uuid.UUID] = Query(..., min_length=1, max_length=settings.ORDERS_BATCH_GET_MAX_SIZE),
+    session: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_user),
+):
+    "Get many orders by their ids"
+    order_ids = list(dict.fromkeys(ids))
+    orders = await order_cache.get_many(order_ids)
+    missing = [order_id for order_id in order_ids if order_id not in orders]
+    if missing:
+        loaded = [
+            encode_order(order)
+            for order in await session.scalars(orders_by_ids_query(missing))
+        ]
+        await order_cache.set_many(loaded)
+        orders.update((order.id, order) for order in loaded)
+    return JSONBytesResponse(
+        encode_list(
+            [
+                orders[order_id].body
+                for order_id in order_ids
+                if order_id in orders and orders[order_id].user_id == current_user.id
+            ]
+        )
+    )
+
+
+@order_router.patch(
+    "/",
+    response_model=list[OrderRead],
+    dependencies=[Depends(write_rate_limit)],
+    summary="Update Order Statuses in Bulk",
+    description=f"""Updates the statuses of up to {settings.ORDERS_BULK_MAX_SIZE} orders with a single statement.
+    Only orders owned by the current user are updated, the others are left out of the response.
+    The cache is updated for every changed order.""",
+    responses={
+        status.HTTP_200_OK: {"description": "Updated orders"},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {
+            "description": "Invalid status value provided"
+        },
+    },
+)
+async def update_order_statuses(
+    updates: List[OrderStatusUpdate] = Body(
+        ..., min_length=1, max_length=settings.ORDERS_BULK_MAX_SIZE
+    ),
+    session: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_user),
+):
+    "Update many order statuses"
+    statuses = {item.id: item.status for item in updates}
+    new_status = case(
+        {order_id: cast(literal(value.value), Order.status.type) for order_id, value in statuses.items()},
+        value=Order.id,
+    )
+    orders = await session.scalars(
+        update(Order)
+        .where(Order.id == any_(order_ids_param(list(statuses))))
+        .where(Order.user_id == current_user.id)
+        .values(status=new_status)
+        .returning(Order)
+        .execution_options(synchronize_session=False)
+    )
+    updated = [encode_order(order) for order in orders]
+    await session.commit()
+    await order_cache.set_many(updated, broadcast=True)
+    return JSONBytesResponse(encode_list([order.body for order in updated]))
 
 
 @order_router.get(
     "/{order_id}/",
     response_model=OrderRead,
+    dependencies=[Depends(read_rate_limit)],
     summary="Get Order by ID",
     description=f"""Retrieves details for a specific order by its UUID.
-    Checks Redis cache first (TTL: {CACHE_EXPIRING_TIME} seconds).
+    Checks the in-process and Redis caches first (TTL: {order_cache.ttl} seconds).
     Only the order owner can access it.""",
     responses={
         status.HTTP_200_OK: {"description": "Order details retrieved successfully"},
     },
 )
-@cache(expire=CACHE_EXPIRING_TIME, key_builder=key_builder)
 async def get_order(
     order_id: uuid.UUID,
-    session: Session = Depends(get_session),
     current_user: UserRead = Depends(get_current_user),
 ):
     "Get order by it's id"
-    order = session.get(Order, order_id)
-    if not order:
+
+    async def load_order() -> EncodedOrder | None:
+        # The load is shared by every coalesced caller, so it must not use the
+        # session of the request that started it, which closes if that request is cancelled
+        async with SessionLocal() as session:
+            order = await session.scalar(order_query(order_id))
+            return encode_order(order) if order else None
+
+    order = await order_cache.get_or_load(order_id, load_order)
+    if order is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Order with id {order_id} not found",
@@ -79,12 +287,13 @@ async def get_order(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this order",
         )
-    return order
+    return JSONBytesResponse(order.body)
 
 
 @order_router.patch(
     "/{order_id}/",
     response_model=OrderRead,
+    dependencies=[Depends(write_rate_limit)],
     summary="Update Order Status",
     description="""Updates the status of an existing order.
     Only the order owner can perform this action.
@@ -99,53 +308,209 @@ async def get_order(
 async def update_order_status(
     order_id: uuid.UUID,
     order_update: OrderUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: UserRead = Depends(get_current_user),
 ):
     "Update order status"
-    order = session.get(Order, order_id)
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Order with id {order_id} not found",
+    order = (
+        await session.scalars(
+            update(Order)
+            .where(Order.id == order_id, Order.user_id == current_user.id)
+            .values(status=order_update.status)
+            .returning(Order)
+            .execution_options(synchronize_session=False)
         )
-    if order.user_id != current_user.id:
+    ).first()
+    if not order:
+        # Only failed updates pay for finding out why
+        owner_id = await session.scalar(order_owner_query(order_id))
+        if owner_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Order with id {order_id} not found",
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this order",
         )
-    order.status = order_update.status
-    session.commit()
-    session.refresh(order)
+    encoded = encode_order(order)
+    await session.commit()
+    await order_cache.set(encoded, broadcast=True)
+    return JSONBytesResponse(encoded.body)
+
+
+def order_filter(
+    status_in: List[OrderStatus] | None = Query(
+        None, alias="status", description="Only orders in one of these statuses"
+    ),
+    created_from: datetime | None = Query(None, description="Only orders created at or after this time"),
+    created_to: datetime | None = Query(None, description="Only orders created before this time"),
+    sku: str | None = Query(None, description="Only orders containing an item with this SKU"),
+) -> OrderFilter:
+    "Order filter from the query parameters"
+    if created_from and created_to and as_utc(created_from) >= as_utc(created_to):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="created_from must be before created_to",
+        )
+    return OrderFilter(status=status_in, created_from=created_from, created_to=created_to, sku=sku)
+
+
+def order_conditions(user_id: int, filters: OrderFilter | None = None) -> list:
+    "WHERE conditions selecting the orders of a user that match filters"
+    conditions = [Order.user_id == user_id]
+    if filters is None:
+        return conditions
+    if filters.status:
+        conditions.append(Order.status.in_(filters.status))
+    if filters.created_from:
+        conditions.append(Order.created_at >= as_utc(filters.created_from))
+    if filters.created_to:
+        conditions.append(Order.created_at < as_utc(filters.created_to))
+    if filters.sku:
+        # items @> '[{"sku": ...}]' is served by the GIN index on items
+        conditions.append(Order.items.contains([{"sku": filters.sku}]))
+    return conditions
+
+
+def user_orders_query(
+    user_id: int,
+    cursor: str | None = None,
+    filters: OrderFilter | None = None,
+    sort: SortOrder = SortOrder.ASC,
+) -> Select:
+    "Orders of a user in (created_at, id) order, starting after cursor"
+    position = tuple_(Order.created_at, Order.id)
+    query = select(Order).where(*order_conditions(user_id, filters))
+    if sort == SortOrder.DESC:
+        query = query.order_by(Order.created_at.desc(), Order.id.desc())
+    else:
+        query = query.order_by(Order.created_at, Order.id)
+    if cursor:
+        created_at, order_id = decode_cursor(cursor)
+        if sort == SortOrder.DESC:
+            query = query.where(position < (created_at, order_id))
+        else:
+            query = query.where(position > (created_at, order_id))
+    return query
+
+
+def user_stats_query(user_id: int, filters: OrderFilter | None = None) -> Select:
+    "Order counts and totals of a user per status and per UTC day in one pass"
+    # A literal instead of a bound 'day' so the expression in GROUP BY matches the one in SELECT
+    day = cast(func.date_trunc(literal_column("'day'"), Order.created_at), Date)
+    return (
+        select(
+            Order.status,
+            day.label("day"),
+            func.count().label("order_count"),
+            func.sum(Order.total_price).label("total_price"),
+            func.grouping(Order.status).label("by_day"),
+        )
+        .where(*order_conditions(user_id, filters))
+        .group_by(func.grouping_sets(Order.status, day))
+        .order_by(day, Order.status)
+    )
 
-    redis_backend: RedisBackend = FastAPICache.get_backend()
-    cache_key = key_builder(order_id=order_id)
-    order_data = OrderRead.model_validate(order).model_dump_json()
-    await redis_backend.set(cache_key, order_data, expire=CACHE_EXPIRING_TIME)
-    return order
+
+async def stream_orders(query: Select) -> AsyncIterator[bytes]:
+    "Stream orders as NDJSON lines from a server-side cursor"
+    async with SessionLocal() as session:
+        orders = await session.stream_scalars(
+            query.execution_options(yield_per=settings.ORDERS_STREAM_CHUNK_SIZE)
+        )
+        async for order in orders:
+            yield encode_order(order, option=orjson.OPT_APPEND_NEWLINE).body
+
+
+def check_user_access(user_id: int, current_user: UserRead):
+    "Only the user themselves can access their orders"
+    if user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this user's orders",
+        )
 
 
 @order_router.get(
     "/user/{user_id}",
-    response_model=list[OrderRead],
-    summary="Get All Orders for a User",
-    description="Retrieves a list of all orders belonging to the specified user ID. Only the user themselves can access their orders.",
+    response_model=OrderPage,
+    dependencies=[Depends(read_rate_limit)],
+    summary="Get Orders for a User",
+    description="""Retrieves orders belonging to the specified user ID one page at a time,
+    oldest first or newest first with `sort=desc`.
+    Orders can be filtered by status (repeat `status` for several), creation time range and SKU.
+    Pass `next_cursor` from the previous page as `cursor`, with the same filters and sort, to get the next one.
+    With `stream=true` all remaining orders are streamed as NDJSON instead.
+    Only the user themselves can access their orders.""",
     responses={
         status.HTTP_200_OK: {
-            "description": "List of user orders retrieved successfully"
+            "description": "Page of user orders retrieved successfully",
+            "content": {"application/x-ndjson": {}},
         },
+        status.HTTP_400_BAD_REQUEST: {"description": "Invalid cursor or time range"},
     },
 )
 async def get_user_orders(
     user_id: int,
-    session: Session = Depends(get_session),
+    limit: int = Query(
+        settings.ORDERS_PAGE_DEFAULT_LIMIT, ge=1, le=settings.ORDERS_PAGE_MAX_LIMIT
+    ),
+    cursor: str | None = Query(None, description="Cursor returned with the previous page"),
+    sort: SortOrder = Query(SortOrder.ASC, description="Creation time order of the orders"),
+    stream: bool = Query(False, description="Stream all orders after the cursor as NDJSON"),
+    filters: OrderFilter = Depends(order_filter),
+    session: AsyncSession = Depends(get_session),
     current_user: UserRead = Depends(get_current_user),
 ):
-    "Get all orders for a user"
-    if user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this user's orders",
+    "Get a page of orders for a user"
+    check_user_access(user_id, current_user)
+    query = user_orders_query(user_id, cursor, filters, sort)
+    if stream:
+        return StreamingResponse(stream_orders(query), media_type="application/x-ndjson")
+    orders = (await session.scalars(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_cursor(orders[-1].created_at, orders[-1].id)
+    return JSONBytesResponse(
+        dumps({"items": [order_values(order) for order in orders], "next_cursor": next_cursor})
+    )
+
+
+@order_router.get(
+    "/user/{user_id}/stats",
+    response_model=OrderStats,
+    dependencies=[Depends(read_rate_limit)],
+    summary="Get Order Stats for a User",
+    description="""Returns the number and total value of the user's orders, per status and per UTC day.
+    Accepts the same filters as the order listing.
+    Only the user themselves can access their orders.""",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Invalid time range"},
+    },
+)
+async def get_user_order_stats(
+    user_id: int,
+    filters: OrderFilter = Depends(order_filter),
+    session: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_user),
+):
+    "Get order counts and totals for a user"
+    check_user_access(user_id, current_user)
+    by_status, by_day = [], []
+    for row in await session.execute(user_stats_query(user_id, filters)):
+        if row.by_day:
+            by_day.append({"day": row.day, "count": row.order_count, "total_price": row.total_price})
+        else:
+            by_status.append({"status": row.status, "count": row.order_count, "total_price": row.total_price})
+    return JSONBytesResponse(
+        dumps(
+            {
+                "count": sum(row["count"] for row in by_status),
+                "total_price": sum((row["total_price"] for row in by_status), Decimal("0")),
+                "by_status": by_status,
+                "by_day": by_day,
+            }
         )
-    orders = session.query(Order).filter_by(user_id=user_id).all()
-    return orders
+    )
@@ -0,0 +1,24 @@
+import base64
+import uuid
+from datetime import datetime
+from fastapi import HTTPException, status
+from src.db.models.order import as_utc
+
+
+def encode_cursor(created_at: datetime, order_id: uuid.UUID) -> str:
+    "Encode the (created_at, id) keyset position of the last returned order"
+    raw = f"{created_at.isoformat()}|{order_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    "Decode a cursor produced by encode_cursor"
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, order_id = raw.split("|")
+        # An edited cursor may carry an offset, the column is naive UTC
+        return as_utc(datetime.fromisoformat(created_at)), uuid.UUID(order_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
@@ -0,0 +1,6 @@
+from fastapi.responses import Response
+
+
+class JSONBytesResponse(Response):
+    "JSON response whose body is already encoded, skips response_model validation"
+    media_type = "application/json"
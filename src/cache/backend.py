@@ -0,0 +1,152 @@
+import time
+import uuid
+import asyncio
+import logging
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from fastapi_cache.backends.redis import RedisBackend
+from src.cache.lru import TTLCache
+
+
+class TwoTierBackend(RedisBackend):
+    """
+    fastapi-cache backend with a short-lived in-process LRU (L1) in front of Redis (L2).
+    Replicas drop stale L1 entries when an invalidation is published on the pub/sub channel.
+    """
+
+    def __init__(self, redis: Redis, maxsize: int, ttl: float, max_item_bytes: int, channel: str):
+        super().__init__(redis)
+        self.l1 = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.max_item_bytes = max_item_bytes
+        self.channel = channel
+        self.instance_id = uuid.uuid4().hex
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self._listener: asyncio.Task | None = None
+
+    def _remember(self, key: str, value: bytes, ttl: int | None):
+        "Keep a copy in L1 together with the expiry it has in L2"
+        if len(value) > self.max_item_bytes:
+            return
+        expires_at = time.monotonic() + ttl if ttl and ttl > 0 else None
+        self.l1.set(key, (expires_at, value), ttl=ttl if expires_at else None)
+
+    async def get_with_ttl(self, key: str) -> tuple[int, bytes | None]:
+        entry = self.l1.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            return (int(expires_at - time.monotonic()) if expires_at else -1), value
+        ttl, value = await super().get_with_ttl(key)
+        if value is None:
+            self.l2_misses += 1
+            return ttl, None
+        self.l2_hits += 1
+        self._remember(key, value, ttl)
+        return ttl, value
+
+    async def get(self, key: str) -> bytes | None:
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key: str, value: bytes, expire: int | None = None) -> None:
+        await super().set(key, value, expire=expire)
+        self._remember(key, value if isinstance(value, bytes) else value.encode(), expire)
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        "Values of the given keys from L1 and a single MGET to Redis for the rest"
+        found = {}
+        missing = []
+        for key in keys:
+            entry = self.l1.get(key)
+            if entry is not None:
+                found[key] = entry[1]
+            else:
+                missing.append(key)
+        if missing:
+            for key, value in zip(missing, await self.redis.mget(missing)):
+                if value is None:
+                    self.l2_misses += 1
+                    continue
+                self.l2_hits += 1
+                self._remember(key, value, None)
+                found[key] = value
+        return found
+
+    async def set_many(self, values: dict[str, bytes], expire: int | None = None, broadcast: bool = False):
+        "Write many keys, and optionally publish their invalidations, in one pipeline"
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, value, ex=expire)
+                if broadcast:
+                    pipe.publish(self.channel, f"{self.instance_id} {key}")
+            await pipe.execute()
+        for key, value in values.items():
+            self._remember(key, value, expire)
+
+    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
+        if key:
+            self.l1.pop(key)
+        else:
+            self.l1.clear()
+        return await super().clear(namespace=namespace, key=key)
+
+    async def publish_invalidation(self, key: str):
+        "Tell other replicas to drop their L1 copy of key"
+        await self.redis.publish(self.channel, f"{self.instance_id} {key}")
+
+    async def invalidate(self, key: str):
+        "Delete key and publish its invalidation in one pipeline"
+        self.l1.pop(key)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(key)
+            pipe.publish(self.channel, f"{self.instance_id} {key}")
+            await pipe.execute()
+
+    async def start_listener(self):
+        "Start consuming invalidations from the pub/sub channel"
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            # Holds one connection of the shared pool while subscribed
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                while True:
+                    # A bounded wait stays under the socket timeout and lets health checks run
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is None or message["type"] != "message":
+                        continue
+                    sender, _, key = message["data"].decode().partition(" ")
+                    if sender != self.instance_id:
+                        self.l1.pop(key)
+            except RedisError as e:
+                # Invalidations may have been missed while disconnected
+                logging.error(f"Cache invalidation listener failed, clearing L1: {e}")
+                self.l1.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def stats(self) -> dict:
+        "Hit ratios and counters per tier"
+        l1 = self.l1.stats()
+        l1_total = l1["hits"] + l1["misses"]
+        l2_total = self.l2_hits + self.l2_misses
+        return {
+            "l1": {**l1, "hit_ratio": l1["hits"] / l1_total if l1_total else 0.0},
+            "l2": {
+                "hits": self.l2_hits,
+                "misses": self.l2_misses,
+                "hit_ratio": self.l2_hits / l2_total if l2_total else 0.0,
+            },
+        }
@@ -0,0 +1,201 @@
+import math
+import time
+import uuid
+import random
+import asyncio
+import logging
+from typing import Awaitable, Callable
+import msgpack
+from fastapi_cache import FastAPICache
+from redis.exceptions import RedisError
+from src.cache.backend import TwoTierBackend
+from src.core.config import settings
+from src.core.encoding import EncodedOrder
+from src.core.tracing import get_tracer
+
+ORDER_CACHE_NAMESPACE = "order"
+
+# Delete the lock only if it is still ours
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def order_cache_key(order_id: uuid.UUID | str) -> str:
+    "Cache key of an order, shared by reads, write-through and invalidation"
+    return f"{ORDER_CACHE_NAMESPACE}:{order_id}"
+
+
+def pack_entry(order: EncodedOrder, delta: float = 0.0) -> bytes:
+    "Pack an encoded order with its owner and the time in seconds it took to load it"
+    return msgpack.packb({"u": order.user_id, "b": order.body, "d": delta})
+
+
+def unpack_entry(order_id: uuid.UUID, data: bytes) -> tuple[EncodedOrder, float]:
+    entry = msgpack.unpackb(data)
+    return EncodedOrder(order_id, entry["u"], entry["b"]), entry["d"]
+
+
+class OrderCache:
+    """
+    Cache of order data, not of rendered responses.
+    Callers must still check ownership of every order they get from it.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        xfetch_beta: float,
+        lock_ttl: float,
+        lock_wait: float,
+        backend: TwoTierBackend | None = None,
+    ):
+        self.ttl = ttl
+        self.xfetch_beta = xfetch_beta
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self._backend = backend
+        self._flights: dict[str, asyncio.Future] = {}
+
+    @property
+    def backend(self) -> TwoTierBackend:
+        return self._backend or FastAPICache.get_backend()
+
+    async def get(self, order_id: uuid.UUID) -> EncodedOrder | None:
+        data = await self.backend.get(order_cache_key(order_id))
+        return unpack_entry(order_id, data)[0] if data is not None else None
+
+    async def set(self, order: EncodedOrder, broadcast: bool = False, delta: float = 0.0):
+        "Write an order through to the cache, broadcast=True drops stale copies on other replicas"
+        key = order_cache_key(order.id)
+        with get_tracer().start_as_current_span("cache set", attributes={"order.id": str(order.id)}):
+            try:
+                if broadcast:
+                    # The write and its invalidation go out in one pipeline
+                    await self.backend.set_many({key: pack_entry(order, delta)}, expire=self.ttl, broadcast=True)
+                else:
+                    await self.backend.set(key, pack_entry(order, delta), expire=self.ttl)
+            except RedisError:
+                # Writes are best effort, they follow a commit the caller must still report
+                logging.warning("Order cache write failed", exc_info=True)
+
+    async def get_many(self, order_ids: list[uuid.UUID]) -> dict[uuid.UUID, EncodedOrder]:
+        "Cached orders among order_ids, keyed by id"
+        keys = {order_cache_key(order_id): order_id for order_id in order_ids}
+        with get_tracer().start_as_current_span("cache get_many") as span:
+            try:
+                found = await self.backend.get_many(list(keys))
+            except RedisError:
+                logging.warning("Order cache read failed, loading from the database", exc_info=True)
+                found = {}
+            span.set_attribute("cache.requested", len(keys))
+            span.set_attribute("cache.found", len(found))
+        return {keys[key]: unpack_entry(keys[key], data)[0] for key, data in found.items()}
+
+    async def set_many(self, orders: list[EncodedOrder], broadcast: bool = False):
+        "Write many orders through to the cache in one pipeline"
+        with get_tracer().start_as_current_span("cache set_many", attributes={"cache.count": len(orders)}):
+            try:
+                await self.backend.set_many(
+                    {order_cache_key(order.id): pack_entry(order) for order in orders},
+                    expire=self.ttl,
+                    broadcast=broadcast,
+                )
+            except RedisError:
+                logging.warning("Order cache write failed", exc_info=True)
+
+    async def invalidate(self, order_id: uuid.UUID):
+        try:
+            await self.backend.invalidate(order_cache_key(order_id))
+        except RedisError:
+            logging.warning("Order cache invalidation failed", exc_info=True)
+
+    def _refresh_early(self, ttl: int, delta: float) -> bool:
+        "XFetch: renew a key before it expires, more likely the closer it is to expiry"
+        if ttl < 0 or not delta:
+            return False
+        return -delta * self.xfetch_beta * math.log(1 - random.random()) >= ttl
+
+    async def get_or_load(
+        self, order_id: uuid.UUID, loader: Callable[[], Awaitable[EncodedOrder | None]]
+    ) -> EncodedOrder | None:
+        """
+        Read-through get that lets a single caller per key load the order.
+        Concurrent misses in this process share one load, other processes wait
+        for the holder of the Redis lock, and hot keys are renewed early.
+        """
+        key = order_cache_key(order_id)
+        with get_tracer().start_as_current_span("cache get", attributes={"order.id": str(order_id)}) as span:
+            try:
+                ttl, data = await self.backend.get_with_ttl(key)
+            except RedisError:
+                # A miss: concurrent callers still share one load
+                logging.warning("Order cache read failed, loading from the database", exc_info=True)
+                ttl, data = -1, None
+            span.set_attribute("cache.hit", data is not None)
+        stale = None
+        if data is not None:
+            order, delta = unpack_entry(order_id, data)
+            if not self._refresh_early(ttl, delta):
+                return order
+            stale = order
+        flight = self._flights.get(key)
+        if flight is not None:
+            return stale if stale is not None else await asyncio.shield(flight)
+        flight = asyncio.ensure_future(self._load(order_id, loader, stale))
+        self._flights[key] = flight
+        flight.add_done_callback(lambda _: self._flights.pop(key, None))
+        return await asyncio.shield(flight)
+
+    async def _load(self, order_id: uuid.UUID, loader, stale: EncodedOrder | None) -> EncodedOrder | None:
+        redis = self.backend.redis
+        key = order_cache_key(order_id)
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        try:
+            locked = await redis.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+        except RedisError:
+            # Without Redis there is nothing to coordinate with or to store into
+            logging.warning("Order cache lock failed, loading from the database", exc_info=True)
+            return stale if stale is not None else await loader()
+        if locked:
+            try:
+                return await self._load_and_store(loader)
+            finally:
+                try:
+                    await redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except RedisError:
+                    # The lock expires after lock_ttl
+                    logging.warning("Order cache lock release failed", exc_info=True)
+        if stale is not None:
+            # Another process is already renewing the key
+            return stale
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+            try:
+                data = await self.backend.get(key)
+            except RedisError:
+                logging.warning("Order cache read failed, loading from the database", exc_info=True)
+                return await loader()
+            if data is not None:
+                return unpack_entry(order_id, data)[0]
+        return await self._load_and_store(loader)
+
+    async def _load_and_store(self, loader) -> EncodedOrder | None:
+        start = time.perf_counter()
+        order = await loader()
+        if order is not None:
+            await self.set(order, delta=time.perf_counter() - start)
+        return order
+
+
+order_cache = OrderCache(
+    ttl=settings.ORDER_CACHE_TTL,
+    xfetch_beta=settings.ORDER_CACHE_XFETCH_BETA,
+    lock_ttl=settings.ORDER_CACHE_LOCK_TTL,
+    lock_wait=settings.ORDER_CACHE_LOCK_WAIT,
+)
@@ -5,8 +5,36 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 
 import time
+from concurrent.futures import ThreadPoolExecutor
 from celery import Celery
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_shutdown,
+)
+from opentelemetry import context as trace_context
+from opentelemetry.context import Context
+from opentelemetry.trace import SpanKind
 from src.core.config import settings
+from src.core.metrics import (
+    CELERY_TASK_DURATION,
+    ORDER_STAGE_DURATION,
+    QueueDepthCollector,
+    register_collector,
+    serve_metrics,
+)
+from src.core.tracing import (
+    extract_request_context,
+    get_tracer,
+    inject_context,
+    record_wait,
+    setup_tracing,
+    shutdown_tracing,
+)
 
 celery_app = Celery(
     "worker",
@@ -21,16 +49,101 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    worker_pool=settings.CELERY_WORKER_POOL,
+    worker_prefetch_multiplier=settings.CELERY_PREFETCH_MULTIPLIER,
+    task_acks_late=settings.CELERY_ACKS_LATE,
+    task_reject_on_worker_lost=settings.CELERY_ACKS_LATE,
+    task_ignore_result=settings.CELERY_IGNORE_RESULT,
+    result_expires=settings.CELERY_RESULT_EXPIRES,
 )
+if settings.CELERY_WORKER_CONCURRENCY:
+    celery_app.conf.worker_concurrency = settings.CELERY_WORKER_CONCURRENCY
+
+task_started: dict[str, float] = {}
+queue_stage = ORDER_STAGE_DURATION.labels("queue")
+processing_stage = ORDER_STAGE_DURATION.labels("processing")
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    "Expose worker metrics, forked pool processes need PROMETHEUS_MULTIPROC_DIR to be included"
+    if not settings.METRICS_ENABLED:
+        return
+    if settings.CELERY_BROKER_URL.startswith("redis"):
+        register_collector(QueueDepthCollector(settings.CELERY_BROKER_URL, [celery_app.conf.task_default_queue]))
+    serve_metrics(settings.METRICS_PORT)
+
+@worker_init.connect
+@worker_process_init.connect
+def start_tracing(**kwargs):
+    "Export spans of the worker, forked pool processes replace the provider they inherited"
+    setup_tracing("worker")
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def stop_tracing(**kwargs):
+    shutdown_tracing()
+
+@before_task_publish.connect
+def inject_trace_headers(headers: dict | None = None, **kwargs):
+    "Publish the current trace context in the task message headers"
+    if headers is not None:
+        headers.update(inject_context())
+
+@task_prerun.connect
+def start_task_timer(task_id: str, **kwargs):
+    task_started[task_id] = time.perf_counter()
+
+@task_postrun.connect
+def observe_task_duration(task_id: str, task, state: str | None = None, **kwargs):
+    started = task_started.pop(task_id, None)
+    if started is not None:
+        CELERY_TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
+
+def process_order(order_id: str, context: Context | None = None) -> str:
+    "Process a single order, I/O bound"
+    logging.info(f"Processing order {order_id}")
+    with get_tracer().start_as_current_span(
+        "process order", context=context, attributes={"order.id": order_id}
+    ), processing_stage.time():
+        time.sleep(settings.ORDER_PROCESSING_TIME)
+    return f"Order {order_id} processed successfully"
 
 @celery_app.task(name="process_order")
 def process_order_task(order_id: str, **kwargs):
     "Background task to process an order"
     try:
-        logging.info(f"Processing order {order_id}")
-        time.sleep(2)
+        result = process_order(order_id, extract_request_context(process_order_task.request))
         print(f"Order {order_id} processed")
-        return f"Order {order_id} processed successfully"
+        return result
     except Exception as e:
         logging.error(f"Error during processing order {order_id}: {e}", exc_info=True)
-        raise
\ No newline at end of file
+        raise
+
+@celery_app.task(name="process_orders_batch")
+def process_orders_batch_task(order_ids: list[str], dispatched_at: float | None = None):
+    "Background task to process many orders concurrently in one worker slot"
+    parent = extract_request_context(process_orders_batch_task.request)
+    if dispatched_at is not None:
+        waited = max(0.0, time.time() - dispatched_at)
+        for _ in order_ids:
+            queue_stage.observe(waited)
+        record_wait("queue wait", dispatched_at, parent, **{"orders.count": len(order_ids)})
+    workers = min(len(order_ids), settings.ORDER_BATCH_CONCURRENCY) or 1
+    failed = []
+    with get_tracer().start_as_current_span(
+        "process batch", context=parent, kind=SpanKind.CONSUMER, attributes={"orders.count": len(order_ids)}
+    ):
+        # Pool threads do not inherit the current context, hand it over explicitly
+        batch_context = trace_context.get_current()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                order_id: executor.submit(process_order, order_id, batch_context) for order_id in order_ids
+            }
+            for order_id, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Error during processing order {order_id}: {e}", exc_info=True)
+                    failed.append(order_id)
+    logging.info(f"Processed batch of {len(order_ids)} orders, {len(failed)} failed")
+    return {"processed": len(order_ids) - len(failed), "failed": failed}
@@ -1,4 +1,5 @@
 import os
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,21 +9,102 @@ class Settings(BaseSettings):
         extra='ignore'
     )
 
-    SECRET_KEY: str
+    SECRET_KEY: str | None = None
 
     DATABASE_URL: str
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_PRE_PING: bool = True
+
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8000
+    API_WORKERS: int = 2
+    API_LOOP: str = "uvloop"
+    API_HTTP: str = "httptools"
+    API_BACKLOG: int = 2048
+    API_KEEPALIVE_TIMEOUT: int = 5
+    API_GRACEFUL_SHUTDOWN_TIMEOUT: int = 30
+    API_ACCESS_LOG: bool = False
 
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"
+    JWT_KEYS_DIR: str = "keys"
+    JWT_SIGNING_KID: str | None = None
+
+    AUTH_CACHE_MAXSIZE: int = 10000
+    AUTH_CACHE_TTL: float = 60
+
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_CONCURRENCY: int = 4
+
+    ORDERS_PAGE_DEFAULT_LIMIT: int = 50
+    ORDERS_PAGE_MAX_LIMIT: int = 500
+    ORDERS_STREAM_CHUNK_SIZE: int = 500
+    ORDERS_BULK_MAX_SIZE: int = 1000
+    ORDERS_BATCH_GET_MAX_SIZE: int = 100
 
     KAFKA_BOOTSTRAP_SERVERS: str
     KAFKA_NEW_ORDERS_TOPIC: str = "new-orders"
+    KAFKA_LINGER_MS: int = 20
+    KAFKA_BATCH_SIZE: int = 262144
+    KAFKA_COMPRESSION_TYPE: str = "lz4"
+    KAFKA_QUEUE_MAX_MESSAGES: int = 100000
+    KAFKA_CONSUMER_PROCESSES: int = 1
+    KAFKA_CONSUMER_BATCH_SIZE: int = 500
+    KAFKA_CONSUMER_BATCH_TIMEOUT: float = 1.0
+    KAFKA_CONSUMER_RETRY_BACKOFF: float = 1.0
+
+    OUTBOX_BATCH_SIZE: int = 1000
+    OUTBOX_POLL_INTERVAL: float = 0.2
 
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
+    CELERY_WORKER_POOL: str = "prefork"
+    CELERY_WORKER_CONCURRENCY: int | None = None
+    CELERY_PREFETCH_MULTIPLIER: int = 4
+    CELERY_ACKS_LATE: bool = True
+    CELERY_IGNORE_RESULT: bool = False
+    CELERY_RESULT_EXPIRES: int = 3600
 
-    SLOWAPI_REDIS_URL: str
+    ORDER_PROCESSING_TIME: float = 2
+    ORDER_BATCH_SIZE: int = 100
+    ORDER_BATCH_CONCURRENCY: int = 100
+
+    METRICS_ENABLED: bool = True
+    METRICS_PORT: int = 9100
+    TRACING_EXPORTER: str = "none"
+    TRACING_DIR: str = "traces"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SAMPLE_RATIO: float = 1.0
+
+    REDIS_POOL_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 1.0
+    REDIS_SOCKET_TIMEOUT: float = 1.0
+    REDIS_CONNECT_TIMEOUT: float = 1.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+
+    RATE_LIMIT_REDIS_URL: str = Field(
+        validation_alias=AliasChoices("RATE_LIMIT_REDIS_URL", "SLOWAPI_REDIS_URL")
+    )
+    RATE_LIMIT_LOCAL_BATCH: int = 1
+    RATE_LIMIT_LOCAL_TTL: float = 1.0
+    RATE_LIMIT_LOCAL_MAXSIZE: int = 100000
+    RATE_LIMIT_AUTH_RATE: float = 1.0
+    RATE_LIMIT_AUTH_BURST: int = 5
+    RATE_LIMIT_READ_RATE: float = 20.0
+    RATE_LIMIT_READ_BURST: int = 40
+    RATE_LIMIT_WRITE_RATE: float = 5.0
+    RATE_LIMIT_WRITE_BURST: int = 10
 
     FASTAPI_CACHE_REDIS_URL: str
+    ORDER_CACHE_TTL: int = 300
+    ORDER_CACHE_XFETCH_BETA: float = 1.0
+    ORDER_CACHE_LOCK_TTL: float = 5.0
+    ORDER_CACHE_LOCK_WAIT: float = 1.0
+    CACHE_L1_MAXSIZE: int = 10000
+    CACHE_L1_TTL: float = 5
+    CACHE_L1_MAX_ITEM_BYTES: int = 65536
+    CACHE_INVALIDATION_CHANNEL: str = "cache-invalidation"
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,46 @@
+import uuid
+from decimal import Decimal
+from typing import NamedTuple
+import orjson
+from src.db.models.order import Order
+
+
+class EncodedOrder(NamedTuple):
+    "An order's OrderRead JSON, encoded once and shared by the response, the cache and Kafka"
+
+    id: uuid.UUID
+    user_id: int
+    body: bytes
+
+
+def order_values(order: Order) -> dict:
+    "OrderRead fields read straight from a trusted Order row, without validation"
+    return {
+        "items": order.items,
+        "total_price": order.total_price,
+        "id": order.id,
+        "user_id": order.user_id,
+        "status": order.status,
+        "created_at": order.created_at,
+    }
+
+
+def default(value):
+    "orjson fallback for types it does not serialize natively"
+    if isinstance(value, Decimal):
+        # Same as Pydantic: exact decimal as a string
+        return str(value)
+    raise TypeError
+
+
+def dumps(value, option: int | None = None) -> bytes:
+    return orjson.dumps(value, default=default, option=option)
+
+
+def encode_order(order: Order, option: int | None = None) -> EncodedOrder:
+    return EncodedOrder(order.id, order.user_id, dumps(order_values(order), option=option))
+
+
+def encode_list(bodies: list[bytes]) -> bytes:
+    "JSON array of already encoded values"
+    return b"[" + b",".join(bodies) + b"]"
@@ -1,5 +1,128 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import logging
+import math
+import time
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from src.cache.lru import TTLCache
 from src.core.config import settings
+from src.core.redis_pool import get_redis
 
-limiter = Limiter(key_func=get_remote_address, default_limits=["1/second"], storage_uri=settings.SLOWAPI_REDIS_URL)
\ No newline at end of file
+# Refill, take up to ARGV[3] tokens and save the bucket in one round trip.
+# Redis TIME keeps every API process on the same clock.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) * 1000 / rate) + 1000)
+local retry_after = 0
+if granted == 0 then
+    retry_after = math.ceil((1 - tokens) * 1000 / rate)
+end
+return {granted, retry_after}
+"""
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets kept in Redis and shared by every API process.
+
+    With local_batch > 1 a process takes up to that many tokens per round trip
+    and spends them locally for up to local_ttl seconds, so limits become
+    approximate (unused tokens are lost) in exchange for fewer Redis calls.
+    Rejections are remembered locally until the bucket can refill.
+    """
+
+    def __init__(self, url: str, local_batch: int, local_ttl: float, local_maxsize: int, prefix: str = "ratelimit"):
+        self.url = url
+        self.local_batch = max(1, local_batch)
+        self.prefix = prefix
+        self.enabled = True
+        self.allowed = 0
+        self.rejected = 0
+        self.round_trips = 0
+        self.errors = 0
+        # key -> [tokens left, monotonic time until which the key is rejected]
+        self.leases = TTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self._redis: Redis | None = None
+        self._script = None
+
+    @property
+    def script(self):
+        "TOKEN_BUCKET_SCRIPT bound to a lazily created client, run with EVALSHA"
+        if self._script is None:
+            self._redis = get_redis(self.url)
+            self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+        return self._script
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        "Take a token from the bucket of key, returns 0 when allowed or seconds until one is available"
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        lease = self.leases.get(key)
+        if lease is not None:
+            if lease[1] > now:
+                self.rejected += 1
+                return lease[1] - now
+            if lease[0] > 0:
+                lease[0] -= 1
+                self.allowed += 1
+                return 0.0
+        try:
+            granted, retry_after_ms = await self.script(
+                keys=[f"{self.prefix}:{key}"], args=[rate, burst, min(self.local_batch, burst)]
+            )
+        except RedisError:
+            # Fail open: an unavailable limiter must not take the API down with it
+            self.errors += 1
+            logging.warning("Rate limiter Redis call failed, allowing request", exc_info=True)
+            return 0.0
+        self.round_trips += 1
+        if not granted:
+            retry_after = retry_after_ms / 1000
+            self.leases.set(key, [0, now + retry_after], ttl=retry_after)
+            self.rejected += 1
+            return retry_after
+        if granted > 1:
+            self.leases.set(key, [granted - 1, 0.0])
+        else:
+            self.leases.pop(key)
+        self.allowed += 1
+        return 0.0
+
+    def stats(self) -> dict:
+        "Decision counters and Redis round trips"
+        return {
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "round_trips": self.round_trips,
+            "errors": self.errors,
+            "leases": len(self.leases),
+        }
+
+    async def close(self):
+        "Forget the client, its connections belong to the shared pool"
+        self._redis = None
+        self._script = None
+
+
+def retry_after_header(seconds: float) -> dict:
+    "Retry-After header for a rejected request"
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+limiter = TokenBucketLimiter(
+    settings.RATE_LIMIT_REDIS_URL,
+    local_batch=settings.RATE_LIMIT_LOCAL_BATCH,
+    local_ttl=settings.RATE_LIMIT_LOCAL_TTL,
+    local_maxsize=settings.RATE_LIMIT_LOCAL_MAXSIZE,
+)
@@ -0,0 +1,226 @@
+import os
+import time
+from typing import Callable
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from redis import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# With PROMETHEUS_MULTIPROC_DIR set, metrics of forked workers are merged from files in that directory
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SLOW_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=FAST_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Database statement latency by statement type",
+    ["operation"],
+    buckets=FAST_BUCKETS,
+)
+KAFKA_DELIVERY_DURATION = Histogram(
+    "kafka_delivery_duration_seconds",
+    "Time from produce() to the broker delivery report",
+    ["topic"],
+    buckets=FAST_BUCKETS,
+)
+KAFKA_CONSUMER_LAG = Gauge(
+    "kafka_consumer_lag",
+    "Messages between the consumer position and the high watermark",
+    ["topic", "partition"],
+    multiprocess_mode="livemax",
+)
+KAFKA_CONSUMER_BATCH_DURATION = Histogram(
+    "kafka_consumer_batch_duration_seconds",
+    "Time to dispatch and commit one consumed batch",
+    buckets=FAST_BUCKETS,
+)
+OUTBOX_RELAYED = Counter("outbox_relayed", "Outbox rows produced to Kafka and deleted")
+OUTBOX_LAG = Gauge(
+    "outbox_lag_seconds",
+    "Age of the oldest row of the last relayed outbox batch, 0 when the outbox is empty",
+    multiprocess_mode="livemax",
+)
+ORDER_STAGE_DURATION = Histogram(
+    "order_stage_duration_seconds",
+    "Time an order spends in each pipeline stage: outbox, kafka, queue and processing",
+    ["stage"],
+    buckets=SLOW_BUCKETS,
+)
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task run time by task and final state",
+    ["task", "state"],
+    buckets=SLOW_BUCKETS,
+)
+
+
+class MetricsMiddleware:
+    "ASGI middleware recording request latency per route template"
+
+    def __init__(self, app):
+        self.app = app
+        # Resolved label children, labels() is the costly part of an observation
+        self._children: dict[tuple, Histogram] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in scope, unmatched paths share one label
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else "unmatched", status_code)
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = HTTP_REQUEST_DURATION.labels(key[0], key[1], str(status_code))
+            child.observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine):
+    "Record the duration of every statement executed through engine"
+    # Statement text -> label child, compiled statements are cached so the set stays small
+    children: dict[str, Histogram] = {}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def observe_duration(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+        child = children.get(statement)
+        if child is None:
+            operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "EMPTY"
+            child = DB_QUERY_DURATION.labels(operation)
+            if len(children) < 10000:
+                children[statement] = child
+        child.observe(elapsed)
+
+
+class StatsCollector(Collector):
+    """
+    Exposes the stats() counters components already keep, read only at scrape time
+    so the hot path pays nothing for them.
+    """
+
+    def __init__(self, prefix: str, documentation: str, label: str | None = None, counters: tuple = ()):
+        self.prefix = prefix
+        self.documentation = documentation
+        self.label = label
+        self.counters = set(counters)
+        self.sources: dict[str, Callable[[], dict]] = {}
+
+    def add(self, source: str, stats: Callable[[], dict]):
+        "Report the numeric values of stats() under the label value source"
+        self.sources[source] = stats
+
+    def collect(self):
+        labels = ([self.label] if self.label else []) + (["pid"] if MULTIPROCESS else [])
+        families = {}
+        for source, stats in list(self.sources.items()):
+            values = ([source] if self.label else []) + ([str(os.getpid())] if MULTIPROCESS else [])
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                family = families.get(key)
+                if family is None:
+                    family_type = CounterMetricFamily if key in self.counters else GaugeMetricFamily
+                    family = families[key] = family_type(
+                        f"{self.prefix}_{key}", f"{self.documentation}: {key}", labels=labels
+                    )
+                family.add_metric(values, value)
+        yield from families.values()
+
+
+class QueueDepthCollector(Collector):
+    "Length of Celery queues kept in a Redis broker, read with one pipeline at scrape time"
+
+    def __init__(self, url: str, queues: list[str], timeout: float = 1.0):
+        # A scrape must not hang on an unreachable broker
+        self.redis = Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self.queues = queues
+
+    def collect(self):
+        family = GaugeMetricFamily("celery_queue_depth", "Messages waiting in the broker queue", labels=["queue"])
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                for queue in self.queues:
+                    pipe.llen(queue)
+                depths = pipe.execute()
+        except RedisError:
+            return
+        for queue, depth in zip(self.queues, depths):
+            family.add_metric([queue], depth)
+        yield family
+
+
+_collectors: list[Collector] = []
+
+
+def register_collector(collector: Collector) -> Collector:
+    "Register a custom collector, also in the registry used in multiprocess mode"
+    _collectors.append(collector)
+    REGISTRY.register(collector)
+    return collector
+
+
+cache_stats = register_collector(
+    StatsCollector("cache", "Cache counters per tier", label="tier", counters=("hits", "misses"))
+)
+component_stats = register_collector(
+    StatsCollector(
+        "component", "In-process component counters", label="component",
+        counters=("delivered", "failed", "allowed", "rejected", "round_trips", "errors", "checkouts"),
+    )
+)
+
+
+def metrics_registry() -> CollectorRegistry:
+    "Registry to expose, merging every process of the service in multiprocess mode"
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in _collectors:
+        registry.register(collector)
+    return registry
+
+
+def render_metrics() -> tuple[bytes, str]:
+    "Metrics in the Prometheus text format and their content type"
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+
+def serve_metrics(port: int):
+    "Expose metrics over HTTP on port from a background thread, for processes without the API"
+    start_http_server(port, registry=metrics_registry())
@@ -0,0 +1,90 @@
+import time
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.exceptions import RedisError
+from src.core.config import settings
+from src.core.metrics import component_stats
+
+
+class MeteredConnectionPool(BlockingConnectionPool):
+    """
+    Bounded pool where callers wait up to timeout seconds for a free connection
+    instead of opening more, counting checkouts and waits to size it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # A set, redis-py also releases connections that failed to connect before handing them out
+        self.checked_out: set = set()
+        self.waiting = 0
+        self.checkouts = 0
+        self.errors = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def get_connection(self, *args, **kwargs):
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except RedisError:
+            # Includes waiting longer than timeout for a free connection
+            self.errors += 1
+            raise
+        finally:
+            self.waiting -= 1
+        wait = time.perf_counter() - started
+        self.checkouts += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.checked_out.add(connection)
+        return connection
+
+    async def release(self, connection):
+        self.checked_out.discard(connection)
+        await super().release(connection)
+
+    def stats(self) -> dict:
+        "Connections in use against the limit, callers waiting and checkout wait times"
+        return {
+            "max_connections": self.max_connections,
+            "in_use": len(self.checked_out),
+            "waiting": self.waiting,
+            "checkouts": self.checkouts,
+            "errors": self.errors,
+            "wait_avg_ms": self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+        }
+
+
+# One pool per URL in this process, components on the same Redis share connections
+_pools: dict[str, MeteredConnectionPool] = {}
+
+
+def get_pool(url: str) -> MeteredConnectionPool:
+    "Shared pool for url, created on first use"
+    pool = _pools.get(url)
+    if pool is None:
+        pool = _pools[url] = MeteredConnectionPool.from_url(
+            url,
+            max_connections=settings.REDIS_POOL_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        )
+        kwargs = pool.connection_kwargs
+        name = f"redis_pool:{kwargs.get('host', kwargs.get('path'))}:{kwargs.get('port', '')}/{kwargs.get('db', 0)}"
+        component_stats.add(name, pool.stats)
+    return pool
+
+
+def get_redis(url: str) -> Redis:
+    "Client on the shared pool for url, closing it leaves the pool open"
+    return Redis(connection_pool=get_pool(url))
+
+
+async def close_pools():
+    "Disconnect every pool of this process"
+    for pool in _pools.values():
+        await pool.disconnect()
+    _pools.clear()
@@ -1,9 +1,13 @@
-from datetime import datetime, timedelta, timezone
-from jose import jwt
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.config import settings
-from src.db.models.user import User
+from src.core.tokens import get_keyring
+from src.db.models.user import DEFAULT_ROLES, User
 
 pwd_context = CryptContext(schemes=["bcrypt"])
 
@@ -15,20 +19,88 @@ def get_hash(password: str) -> str:
     "Get hash password"
     return pwd_context.hash(password)
 
-def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
-    "Create access token"
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-
-def authenticate_user(session: Session, email: str, password: str) -> User | None:
+
+class HashingPool:
+    "Bounded process pool that keeps bcrypt work off the event loop"
+
+    def __init__(self, workers: int, concurrency: int):
+        self.workers = workers
+        self.concurrency = concurrency
+        self.queued = 0
+        self.running = 0
+        self._slots = asyncio.Semaphore(concurrency)
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def run(self, func, *args):
+        "Run func in the pool, waiting for a free slot first"
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        "Queue depth and in-flight hashing calls"
+        return {"queued": self.queued, "running": self.running, "concurrency": self.concurrency}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hashing_pool = HashingPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    concurrency=settings.PASSWORD_HASH_CONCURRENCY,
+)
+
+async def verify_password_async(password: str, hash: str) -> bool:
+    "Verify password with hash password in the hashing pool"
+    return await hashing_pool.run(verify_password, password, hash)
+
+async def get_hash_async(password: str) -> str:
+    "Get hash password in the hashing pool"
+    return await hashing_pool.run(get_hash, password)
+
+def create_access_token(user: User, expires_delta: timedelta | None = None) -> str:
+    "Create access token carrying the user id and roles, so validating it needs no lookup"
+    if expires_delta is None:
+        expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    now = int(time.time())
+    claims = {
+        "sub": user.email,
+        "uid": user.id,
+        "roles": list(user.roles or DEFAULT_ROLES),
+        "iat": now,
+        "exp": now + int(expires_delta.total_seconds()),
+    }
+    return get_keyring().sign(claims)
+
+def user_by_email_query(email: str) -> Select:
+    "A user by email, served by the unique email index"
+    return select(User).filter_by(email=email)
+
+async def authenticate_user(session: AsyncSession, email: str, password: str) -> User | None:
     "Authenticate user"
-    user = session.query(User).filter_by(email=email).first()
+    user = (await session.scalars(user_by_email_query(email))).first()
     if not user:
         return None
-    if verify_password(password, user.hashed_password):
-        return user
\ No newline at end of file
+    # Detached so ending the transaction does not expire it, then the
+    # connection goes back to the pool while the login queues for bcrypt
+    session.expunge(user)
+    await session.rollback()
+    if await verify_password_async(password, user.hashed_password):
+        return user
@@ -0,0 +1,108 @@
+import os
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from src.core.config import settings
+
+SYMMETRIC_ALGORITHMS = {"HS256", "HS384", "HS512"}
+ASYMMETRIC_ALGORITHMS = {"EdDSA", "ES256"}
+
+
+class KeyRing:
+    """
+    Key signing new tokens and every key still accepted when verifying them, by
+    key id. Keeping retired keys for the token lifetime makes rotation seamless.
+    """
+
+    def __init__(self, algorithm: str, signing_kid: str | None, signing_key, verification_keys: dict):
+        self.algorithm = algorithm
+        self.signing_kid = signing_kid
+        self.signing_key = signing_key
+        self.verification_keys = verification_keys
+
+    def sign(self, claims: dict) -> str:
+        if self.signing_key is None:
+            raise RuntimeError("No signing key, set JWT_SIGNING_KID to a private key in JWT_KEYS_DIR")
+        headers = {"kid": self.signing_kid} if self.signing_kid else None
+        return jwt.encode(claims, self.signing_key, algorithm=self.algorithm, headers=headers)
+
+    def verify(self, token: str) -> dict:
+        "Claims of a token signed with an accepted key, raises jwt.InvalidTokenError otherwise"
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.verification_keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown key id {kid!r}")
+        return jwt.decode(token, key, algorithms=[self.algorithm], options={"require": ["exp", "sub"]})
+
+
+def generate_private_key(algorithm: str):
+    "New private key for an asymmetric algorithm"
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    raise ValueError(f"Unsupported asymmetric algorithm {algorithm!r}")
+
+
+def private_pem(key) -> bytes:
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+
+
+def public_pem(key) -> bytes:
+    return key.public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+
+
+def load_keys(directory: str) -> tuple[dict, dict]:
+    "Private and public keys of a directory of <kid>.pem and <kid>.pub.pem files, by key id"
+    private_keys, public_keys = {}, {}
+    if not os.path.isdir(directory):
+        return private_keys, public_keys
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), "rb") as file:
+            data = file.read()
+        if name.endswith(".pub.pem"):
+            public_keys[name.removesuffix(".pub.pem")] = serialization.load_pem_public_key(data)
+        elif name.endswith(".pem"):
+            private_keys[name.removesuffix(".pem")] = serialization.load_pem_private_key(data, password=None)
+    # A service holding a private key also accepts the tokens it signs
+    for kid, key in private_keys.items():
+        public_keys.setdefault(kid, key.public_key())
+    return private_keys, public_keys
+
+
+def load_keyring() -> KeyRing:
+    "Key ring for ALGORITHM: SECRET_KEY for HMAC, the keys of JWT_KEYS_DIR otherwise"
+    algorithm = settings.ALGORITHM
+    kid = settings.JWT_SIGNING_KID
+    if algorithm in SYMMETRIC_ALGORITHMS:
+        if not settings.SECRET_KEY:
+            raise RuntimeError(f"SECRET_KEY is required with ALGORITHM={algorithm}")
+        # Tokens issued before key ids were set carry no kid
+        return KeyRing(algorithm, kid, settings.SECRET_KEY, {None: settings.SECRET_KEY, kid: settings.SECRET_KEY})
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        raise RuntimeError(f"Unsupported ALGORITHM {algorithm!r}")
+    private_keys, public_keys = load_keys(settings.JWT_KEYS_DIR)
+    if kid is not None and kid not in private_keys:
+        raise RuntimeError(f"No private key {kid}.pem in {settings.JWT_KEYS_DIR}")
+    if not public_keys:
+        raise RuntimeError(f"No keys in {settings.JWT_KEYS_DIR}, generate one with python -m src.jwt_keys")
+    # Parsed key objects are reused, so PEM parsing stays off the request path
+    return KeyRing(algorithm, kid, private_keys.get(kid), public_keys)
+
+
+_keyring: KeyRing | None = None
+
+
+def get_keyring() -> KeyRing:
+    "Key ring loaded on first use, so key files are only needed by processes handling tokens"
+    global _keyring
+    if _keyring is None:
+        _keyring = load_keyring()
+    return _keyring
+
+
+def decode_access_token(token: str) -> dict:
+    "Verified claims of an access token"
+    return get_keyring().verify(token)
@@ -0,0 +1,175 @@
+import os
+import time
+from opentelemetry import propagate, trace
+from opentelemetry.context import Context
+from opentelemetry.propagators.textmap import Getter
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.core.config import settings
+
+# Spans only record once setup_tracing() ran with an exporter configured
+_provider: TracerProvider | None = None
+_tracer: trace.Tracer = trace.NoOpTracer()
+
+
+def tracing_enabled() -> bool:
+    return settings.TRACING_EXPORTER != "none"
+
+
+def make_exporter(service: str) -> SpanExporter:
+    "Span exporter selected by TRACING_EXPORTER"
+    if settings.TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    if settings.TRACING_EXPORTER == "file":
+        # One file per process, concurrent appends from several processes would interleave
+        os.makedirs(settings.TRACING_DIR, exist_ok=True)
+        out = open(os.path.join(settings.TRACING_DIR, f"{service}-{os.getpid()}.jsonl"), "a")
+        return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    raise ValueError(f"Unknown TRACING_EXPORTER {settings.TRACING_EXPORTER!r}")
+
+
+def setup_tracing(service: str):
+    """
+    Start exporting spans of this process. Called again in a forked child it
+    replaces the inherited provider, so every process writes its own spans.
+    """
+    global _provider, _tracer
+    if not tracing_enabled():
+        return
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(make_exporter(service)))
+    _provider = provider
+    _tracer = provider.get_tracer("orders")
+
+
+def get_tracer() -> trace.Tracer:
+    return _tracer
+
+
+def shutdown_tracing():
+    "Export pending spans and stop the exporter"
+    global _provider, _tracer
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+        _tracer = trace.NoOpTracer()
+
+
+def inject_context(context: Context | None = None) -> dict[str, str]:
+    "W3C trace context of the current span (or of context), empty when it is not traced"
+    carrier: dict[str, str] = {}
+    propagate.inject(carrier, context=context)
+    return carrier
+
+
+def extract_context(carrier: dict[str, str] | None) -> Context:
+    return propagate.extract(carrier or {})
+
+
+def kafka_headers(carrier: dict[str, str]) -> list[tuple[str, bytes]] | None:
+    return [(key, value.encode()) for key, value in carrier.items()] or None
+
+
+def kafka_carrier(headers: list[tuple[str, bytes]] | None) -> dict[str, str]:
+    return {key: value.decode() for key, value in headers or () if value is not None}
+
+
+class RequestGetter(Getter):
+    "Reads trace headers of a Celery task, which Celery exposes as attributes of its request"
+
+    def get(self, carrier, key: str) -> list[str] | None:
+        value = getattr(carrier, key, None)
+        return [value] if isinstance(value, str) else None
+
+    def keys(self, carrier) -> list[str]:
+        return []
+
+
+def extract_request_context(request) -> Context:
+    "Trace context published with a Celery task"
+    return propagate.extract(request, getter=RequestGetter())
+
+
+def epoch_ns(timestamp: float) -> int:
+    "Span timestamp for a time.time() value"
+    return int(timestamp * 1e9)
+
+
+def record_wait(name: str, started_at: float, context: Context | None = None, **attributes):
+    "Span covering a wait that began at time.time() started_at and ends now"
+    get_tracer().start_span(
+        name, context=context, start_time=epoch_ns(started_at), attributes=attributes
+    ).end(end_time=time.time_ns())
+
+
+class TracingMiddleware:
+    "ASGI middleware opening a server span per request, continuing an incoming traceparent"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        carrier = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope["headers"]
+            if key in (b"traceparent", b"tracestate")
+        }
+        method = scope["method"]
+        with get_tracer().start_as_current_span(
+            method, context=extract_context(carrier), kind=SpanKind.SERVER
+        ) as span:
+
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    span.update_name(f"{method} {route.path}")
+                    span.set_attribute("http.route", route.path)
+
+
+def trace_engine(engine: Engine):
+    "Open a client span around statements executed while a traced operation is in progress"
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_span(conn, cursor, statement, parameters, context, executemany):
+        # Background polling (e.g. the outbox relay) would otherwise start a trace per statement
+        if not trace.get_current_span().is_recording():
+            context._trace_span = None
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "EMPTY"
+        context._trace_span = get_tracer().start_span(
+            f"db {operation}",
+            kind=SpanKind.CLIENT,
+            attributes={"db.system": "postgresql", "db.statement": statement[:1000]},
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end_span(conn, cursor, statement, parameters, context, executemany):
+        if context._trace_span is not None:
+            context._trace_span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def end_failed_span(exception_context):
+        span = getattr(exception_context.execution_context, "_trace_span", None)
+        if span is not None and span.is_recording():
+            span.record_exception(exception_context.original_exception)
+            span.set_status(trace.Status(trace.StatusCode.ERROR))
+            span.end()
@@ -1,16 +1,43 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Integer, Float, JSON, Enum, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, Numeric, Enum, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from src.db.session import Base
 from src.schemas.order import OrderStatus
 
+def utcnow() -> datetime:
+    "Current UTC time as stored in timestamp without time zone columns"
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def as_utc(value: datetime) -> datetime:
+    "Convert a client supplied datetime to the naive UTC form of the columns"
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # status and total_price let stats and filtered listings use index-only scans
+        Index(
+            "ix_orders_user_id_created_at_id_stats",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_include=["status", "total_price"],
+        ),
+        Index("ix_orders_user_id_status_created_at", "user_id", "status", "created_at"),
+        Index(
+            "ix_orders_items",
+            "items",
+            postgresql_using="gin",
+            postgresql_ops={"items": "jsonb_path_ops"},
+        ),
+    )
 
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    items = Column(JSON, nullable=False)
-    total_price = Column(Float, nullable=False)
+    items = Column(JSONB, nullable=False)
+    total_price = Column(Numeric(12, 2), nullable=False)
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING, nullable=False)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
\ No newline at end of file
+    created_at = Column(DateTime, default=utcnow, nullable=False)
\ No newline at end of file
@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, String, LargeBinary, DateTime
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from src.db.session import Base
+from src.db.models.order import utcnow
+
+class OrderOutbox(Base):
+    "Order events waiting to be relayed to Kafka, written in the order's transaction"
+    __tablename__ = "order_outbox"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    order_id = Column(UUID, nullable=False)
+    topic = Column(String, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    # W3C trace context of the request that created the order
+    trace_context = Column(JSONB, nullable=True)
+    created_at = Column(DateTime, default=utcnow, nullable=False)
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from src.db.session import Base
 
+DEFAULT_ROLES = ["user"]
+
 class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True)
     email = Column(String, unique=True, nullable=True, index=True)
-    hashed_password = Column(String, nullable=True)
\ No newline at end of file
+    hashed_password = Column(String, nullable=True)
+    roles = Column(ARRAY(String), nullable=False, server_default=text("'{user}'"))
\ No newline at end of file
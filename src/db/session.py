@@ -1,16 +1,45 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, registry, sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, registry
 from src.core.config import settings
-from typing import Generator
+from src.core.metrics import instrument_engine
+from src.core.tracing import trace_engine, tracing_enabled
+from typing import AsyncGenerator
 
 Base: registry = declarative_base()
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+# Bound by init_engine(), so every process builds its own pool after it started (or forked)
+SessionLocal = async_sessionmaker(expire_on_commit=False)
+_engine: AsyncEngine | None = None
 
-def get_session() -> Generator:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+def init_engine() -> AsyncEngine:
+    "Create the engine of this process on first call and bind SessionLocal to it"
+    global _engine
+    if _engine is None:
+        _engine = create_async_engine(
+            make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg"),
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+            pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        )
+        if settings.METRICS_ENABLED:
+            instrument_engine(_engine.sync_engine)
+        if tracing_enabled():
+            trace_engine(_engine.sync_engine)
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+async def dispose_engine():
+    "Close the pooled connections, the next init_engine() starts a new engine"
+    global _engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+
+
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    async with SessionLocal() as session:
+        yield session
@@ -0,0 +1,43 @@
+"""
+Generate a token signing key pair for key rotation.
+
+Writes <kid>.pem (private, for the service issuing tokens) and <kid>.pub.pem
+(public, for every service validating them) to JWT_KEYS_DIR. Rotate by
+shipping the new public key to validators, then pointing JWT_SIGNING_KID of
+the issuer at the new kid; delete the old key once ACCESS_TOKEN_EXPIRE_MINUTES
+have passed.
+
+Usage:
+    python -m src.jwt_keys 2026-10 --algorithm EdDSA
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import os
+from src.core.config import settings
+from src.core.tokens import ASYMMETRIC_ALGORITHMS, generate_private_key, private_pem, public_pem
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kid", help="key id written to the header of tokens signed with this key")
+    default_algorithm = settings.ALGORITHM if settings.ALGORITHM in ASYMMETRIC_ALGORITHMS else "EdDSA"
+    parser.add_argument("--algorithm", choices=sorted(ASYMMETRIC_ALGORITHMS), default=default_algorithm)
+    parser.add_argument("--dir", default=settings.JWT_KEYS_DIR)
+    args = parser.parse_args()
+
+    os.makedirs(args.dir, exist_ok=True)
+    private_path = os.path.join(args.dir, f"{args.kid}.pem")
+    if os.path.exists(private_path):
+        parser.error(f"{private_path} already exists")
+    key = generate_private_key(args.algorithm)
+    with open(os.open(private_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as file:
+        file.write(private_pem(key))
+    with open(os.path.join(args.dir, f"{args.kid}.pub.pem"), "wb") as file:
+        file.write(public_pem(key.public_key()))
+    print(f"Wrote {private_path} and {args.kid}.pub.pem")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import time
+import asyncio
+import logging
+from datetime import timezone
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.config import settings
+from src.core.encoding import EncodedOrder
+from src.core.metrics import ORDER_STAGE_DURATION, OUTBOX_LAG, OUTBOX_RELAYED
+from src.core.tracing import extract_context, get_tracer, inject_context, kafka_headers, record_wait
+from src.db.models.order import utcnow
+from src.db.models.outbox import OrderOutbox
+
+
+def new_order_event_values(order: EncodedOrder, trace_context: dict[str, str] | None = None) -> dict:
+    """
+    Column values of the outbox row for a new order message to the new_orders topic.
+    The row carries trace_context, by default the one of the current request.
+    """
+    if trace_context is None:
+        trace_context = inject_context()
+    return {
+        "order_id": order.id,
+        "topic": settings.KAFKA_NEW_ORDERS_TOPIC,
+        "payload": order.body,
+        "trace_context": trace_context or None,
+    }
+
+
+def new_order_event(order: EncodedOrder) -> OrderOutbox:
+    "Outbox row for a new order message to the new_orders topic"
+    return OrderOutbox(**new_order_event_values(order))
+
+
+async def relay_batch(session: AsyncSession, batch_size: int) -> tuple[int, float]:
+    """
+    Produce up to batch_size outbox rows and delete them once the broker acked all of them.
+    Rows locked by another relay are skipped. On a delivery failure the transaction
+    rolls back and the whole batch is retried, so delivery is at-least-once.
+    Returns the number of relayed rows and the age of the oldest one in seconds.
+    """
+    # Imported here so the API, which only writes outbox rows, never loads the Kafka client
+    from src.kafka.producer import producer_service
+
+    async with session.begin():
+        rows = (
+            await session.scalars(
+                select(OrderOutbox)
+                .order_by(OrderOutbox.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+        ).all()
+        if not rows:
+            return 0, 0.0
+        tracer = get_tracer()
+        spans = []
+        deliveries = []
+        try:
+            for row in rows:
+                parent = extract_context(row.trace_context)
+                created_at = row.created_at.replace(tzinfo=timezone.utc).timestamp()
+                record_wait("outbox wait", created_at, parent, **{"order.id": str(row.order_id)})
+                span = tracer.start_span(
+                    f"produce {row.topic}",
+                    context=parent,
+                    kind=SpanKind.PRODUCER,
+                    attributes={"order.id": str(row.order_id), "messaging.destination.name": row.topic},
+                )
+                spans.append(span)
+                deliveries.append(
+                    producer_service.produce(
+                        topic=row.topic,
+                        key=str(row.order_id),
+                        value=row.payload,
+                        headers=kafka_headers(inject_context(trace.set_span_in_context(span))),
+                    )
+                )
+            await asyncio.gather(*deliveries)
+        except Exception as e:
+            for span in spans:
+                span.record_exception(e)
+                span.set_status(Status(StatusCode.ERROR))
+            raise
+        finally:
+            for span in spans:
+                span.end()
+        await session.execute(
+            delete(OrderOutbox).where(OrderOutbox.id.in_([row.id for row in rows]))
+        )
+    now = utcnow()
+    outbox_stage = ORDER_STAGE_DURATION.labels("outbox")
+    for row in rows:
+        outbox_stage.observe((now - row.created_at).total_seconds())
+    return len(rows), (now - rows[0].created_at).total_seconds()
+
+
+async def run_relay(session_factory, batch_size: int, poll_interval: float, report_interval: float = 10):
+    "Drain the outbox forever, logging throughput and lag every report_interval seconds"
+    relayed = 0
+    max_lag = 0.0
+    reported_at = time.monotonic()
+    while True:
+        try:
+            async with session_factory() as session:
+                count, lag = await relay_batch(session, batch_size)
+        except Exception as e:
+            logging.error(f"Failed to relay outbox batch: {e}", exc_info=True)
+            count, lag = 0, 0.0
+        relayed += count
+        max_lag = max(max_lag, lag)
+        OUTBOX_RELAYED.inc(count)
+        OUTBOX_LAG.set(lag)
+        elapsed = time.monotonic() - reported_at
+        if elapsed >= report_interval:
+            logging.info(
+                f"Outbox relay: {relayed / elapsed:.1f} msg/s, max lag {max_lag:.3f}s"
+            )
+            relayed, max_lag, reported_at = 0, 0.0, time.monotonic()
+        if count < batch_size:
+            await asyncio.sleep(poll_interval)
@@ -1,39 +1,145 @@
-import json
+import time
+import asyncio
 import logging
-from confluent_kafka import Producer
+import threading
+from confluent_kafka import KafkaException, Producer
 from src.core.config import settings
-from src.schemas.order import OrderRead
+from src.core.metrics import KAFKA_DELIVERY_DURATION
 
 config = {
     'bootstrap.servers': settings.KAFKA_BOOTSTRAP_SERVERS,
-    'acks': 'all'
+    'acks': 'all',
+    'enable.idempotence': True,
+    'linger.ms': settings.KAFKA_LINGER_MS,
+    'batch.size': settings.KAFKA_BATCH_SIZE,
+    'compression.type': settings.KAFKA_COMPRESSION_TYPE,
+    'queue.buffering.max.messages': settings.KAFKA_QUEUE_MAX_MESSAGES,
 }
 
-def delivery_report(err, msg):
-    "Called once for each message produced to indicate delivery result"
+
+def _resolve_delivery(future: asyncio.Future, err, msg):
+    "Complete a delivery future on its event loop"
+    if future.done():
+        return
     if err is not None:
-        logging.error(f"Message delivery failed: {err}")
+        future.set_exception(KafkaException(err))
     else:
-        logging.info(f"Message delivered to {msg.topic()} at offset {msg.offset()}")
+        future.set_result(msg)
+
+
+class KafkaProducerService:
+    "Kafka producer whose delivery reports are served by a background poll thread"
+
+    def __init__(self, config: dict, poll_interval: float = 0.1):
+        self.config = config
+        self.poll_interval = poll_interval
+        self.in_flight = 0
+        self.delivered = 0
+        self.failed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._producer: Producer | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def producer(self) -> Producer:
+        if self._producer is None:
+            self._producer = Producer(self.config)
+        return self._producer
+
+    def start(self):
+        "Start the delivery polling thread if it is not running yet"
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._poll_loop, args=(self.producer,), name="kafka-producer-poll", daemon=True
+            )
+            self._thread.start()
+
+    def _poll_loop(self, producer: Producer):
+        while not self._stop.is_set():
+            producer.poll(self.poll_interval)
+
+    def produce(
+        self, topic: str, value: bytes | str, key: str | None = None, headers: dict | None = None
+    ) -> asyncio.Future:
+        """
+        Queue a message and return a future resolved with the delivered message.
+        Await it to wait for the broker ack or drop it for fire-and-forget.
+        Raises BufferError when the local queue is full.
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Fire-and-forget callers never retrieve the result, failures are logged below
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        sent_at = time.perf_counter()
+        delivery_duration = KAFKA_DELIVERY_DURATION.labels(topic)
+
+        def on_delivery(err, msg):
+            latency = time.perf_counter() - sent_at
+            with self._lock:
+                self.in_flight -= 1
+                if err is not None:
+                    self.failed += 1
+                else:
+                    self.delivered += 1
+                    self.latency_total += latency
+                    self.latency_max = max(self.latency_max, latency)
+            if err is None:
+                delivery_duration.observe(latency)
+            else:
+                logging.error(f"Message delivery failed: {err}")
+            try:
+                loop.call_soon_threadsafe(_resolve_delivery, future, err, msg)
+            except RuntimeError:
+                # Event loop already closed during shutdown
+                pass
+
+        with self._lock:
+            self.in_flight += 1
+        try:
+            self.producer.produce(
+                topic=topic, key=key, value=value, headers=headers, on_delivery=on_delivery
+            )
+        except Exception:
+            with self._lock:
+                self.in_flight -= 1
+            raise
+        return future
+
+    def stats(self) -> dict:
+        "Queue depth, in-flight count and delivery latency"
+        with self._lock:
+            return {
+                "queue_depth": len(self._producer) if self._producer is not None else 0,
+                "in_flight": self.in_flight,
+                "delivered": self.delivered,
+                "failed": self.failed,
+                "latency_avg_ms": self.latency_total / self.delivered * 1000 if self.delivered else 0.0,
+                "latency_max_ms": self.latency_max * 1000,
+            }
+
+    def close(self, timeout: float = 10):
+        "Stop polling and flush pending messages"
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._producer is not None:
+            remaining = self._producer.flush(timeout)
+            if remaining:
+                logging.error(f"{remaining} Kafka messages were not delivered before shutdown")
+
+
+producer_service = KafkaProducerService(config)
 
 def shutdown_kafka():
     "Shutdown the Kafka producer"
     logging.info("Shutting down Kafka producer...")
-    producer.flush()
+    producer_service.close()
     logging.info("Kafka producer shut down successfully.")
-
-producer = Producer(config)
-
-async def send_new_order_message(order: OrderRead):
-    "Produce a new order message to Kafka to the new_orders topic"
-    try:
-        producer.produce(
-            topic=settings.KAFKA_NEW_ORDERS_TOPIC,
-            key=str(order.id),
-            value=json.dumps(order.dump_for_kafka()),
-            callback=delivery_report
-        )
-        producer.poll(0)
-        logging.info(f"Produced new order message: {order.id}")
-    except Exception as e:
-        logging.error(f"Failed to produce new order message: {e}")
\ No newline at end of file
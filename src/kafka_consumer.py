@@ -3,42 +3,171 @@ load_dotenv()
 
 import time
 import logging
-from confluent_kafka import Consumer
+import multiprocessing
+from celery import group
+from opentelemetry.trace import Link, SpanKind
+from confluent_kafka import TIMESTAMP_NOT_AVAILABLE, Consumer, Message, TopicPartition
 from src.core.config import settings
-from src.celery_app.worker import process_order_task
+from src.core.metrics import (
+    KAFKA_CONSUMER_BATCH_DURATION,
+    KAFKA_CONSUMER_LAG,
+    MULTIPROCESS,
+    ORDER_STAGE_DURATION,
+    serve_metrics,
+)
+from src.core.tracing import extract_context, get_tracer, kafka_carrier, setup_tracing, shutdown_tracing
+from src.celery_app.worker import process_orders_batch_task
 
 logging.basicConfig(level=logging.INFO)
 
 config = {
     'bootstrap.servers': settings.KAFKA_BOOTSTRAP_SERVERS,
     'group.id': 'order_processing_group',
-    'auto.offset.reset': 'earliest'
+    'auto.offset.reset': 'earliest',
+    'enable.auto.commit': False,
+    'partition.assignment.strategy': 'cooperative-sticky',
 }
 
-consumer = Consumer(config)
+
+def dispatch(messages: list[Message]):
+    "Publish the batch as one Celery group of batch processing tasks"
+    order_ids = [msg.key().decode() for msg in messages]
+    size = settings.ORDER_BATCH_SIZE
+    tracer = get_tracer()
+    # A consume span per order continues the trace started by its API request
+    consumed = [
+        tracer.start_span(
+            f"consume {msg.topic()}",
+            context=extract_context(kafka_carrier(msg.headers())),
+            kind=SpanKind.CONSUMER,
+            attributes={
+                "order.id": order_id,
+                "messaging.kafka.partition": msg.partition(),
+                "messaging.kafka.offset": msg.offset(),
+            },
+        )
+        for order_id, msg in zip(order_ids, messages)
+    ]
+    links = [Link(span.get_span_context()) for span in consumed if span.get_span_context().is_valid]
+    dispatched_at = time.time()
+    try:
+        # Tasks published inside this span carry its context in their headers
+        with tracer.start_as_current_span("dispatch orders", links=links, attributes={"orders.count": len(order_ids)}):
+            group(
+                process_orders_batch_task.s(order_ids[i:i + size], dispatched_at=dispatched_at)
+                for i in range(0, len(order_ids), size)
+            ).apply_async()
+    finally:
+        for span in consumed:
+            span.end()
+    kafka_stage = ORDER_STAGE_DURATION.labels("kafka")
+    for msg in messages:
+        # Time from produce() in the outbox relay until dispatch to Celery
+        timestamp_type, timestamp = msg.timestamp()
+        if timestamp_type != TIMESTAMP_NOT_AVAILABLE:
+            kafka_stage.observe(max(0.0, dispatched_at - timestamp / 1000))
+
+
+def batch_positions(messages: list[Message]) -> tuple[dict, dict]:
+    "First and next offsets of every partition present in the batch"
+    first, next_ = {}, {}
+    for msg in messages:
+        partition = (msg.topic(), msg.partition())
+        first.setdefault(partition, msg.offset())
+        next_[partition] = msg.offset() + 1
+    return first, next_
+
+
+def record_lag(consumer: Consumer):
+    "Update the lag gauge of every assigned partition from cached watermarks, no broker round trip"
+    for position in consumer.position(consumer.assignment()):
+        _, high = consumer.get_watermark_offsets(position, cached=True)
+        if high >= 0 and position.offset >= 0:
+            KAFKA_CONSUMER_LAG.labels(position.topic, str(position.partition)).set(high - position.offset)
+
+
+def forget_lag(consumer: Consumer, partitions: list[TopicPartition]):
+    "Zero the lag of partitions moved to another consumer, whose own value wins the livemax merge"
+    for partition in partitions:
+        KAFKA_CONSUMER_LAG.labels(partition.topic, str(partition.partition)).set(0)
+
+
+def process_batch(consumer: Consumer, messages: list[Message]) -> bool:
+    """
+    Dispatch a batch and commit its offsets only after dispatch succeeded.
+    On failure the partitions are rewound to the start of the batch for a retry.
+    """
+    valid = []
+    for msg in messages:
+        if msg.error():
+            logging.error(f"Consumer error: {msg.error()}")
+            continue
+        valid.append(msg)
+    first, next_ = batch_positions(valid)
+    try:
+        if valid:
+            dispatch(valid)
+    except Exception as e:
+        logging.error(f"Failed to dispatch {len(valid)} orders, retrying batch: {e}", exc_info=True)
+        for (topic, partition), offset in first.items():
+            consumer.seek(TopicPartition(topic, partition, offset))
+        return False
+    if next_:
+        consumer.commit(
+            offsets=[TopicPartition(topic, partition, offset) for (topic, partition), offset in next_.items()],
+            asynchronous=False,
+        )
+    logging.info(f"Dispatched {len(valid)} orders")
+    return True
+
 
 def start_consume():
+    setup_tracing("kafka-consumer")
+    consumer = None
     try:
-        consumer.subscribe([settings.KAFKA_NEW_ORDERS_TOPIC])
+        consumer = Consumer(config)
+        consumer.subscribe([settings.KAFKA_NEW_ORDERS_TOPIC], on_revoke=forget_lag, on_lost=forget_lag)
         while True:
-            msg = consumer.poll(1.0)
-            if msg is None:
-                continue
-            if msg.error():
-                logging.error(f"Consumer error: {msg.error()}")
+            messages = consumer.consume(
+                num_messages=settings.KAFKA_CONSUMER_BATCH_SIZE,
+                timeout=settings.KAFKA_CONSUMER_BATCH_TIMEOUT,
+            )
+            if not messages:
+                record_lag(consumer)
                 continue
-            message_value = msg.value().decode()
-            message_key = msg.key().decode()
-            logging.info(f"Received message: {message_key} with value: {message_value}")
-            task_result = process_order_task.delay(order_id=message_key, order_body=message_value)
-            logging.info(f"Task result: {task_result}")
+            started = time.perf_counter()
+            dispatched = process_batch(consumer, messages)
+            KAFKA_CONSUMER_BATCH_DURATION.observe(time.perf_counter() - started)
+            record_lag(consumer)
+            if not dispatched:
+                time.sleep(settings.KAFKA_CONSUMER_RETRY_BACKOFF)
     except Exception as e:
         logging.error(f"An unexpected error occurred in the consumer: {e}", exc_info=True)
     finally:
         if consumer is not None:
             logging.info("Closing Kafka consumer...")
-            consumer.close() 
+            consumer.close()
             logging.info("Kafka consumer closed.")
+        shutdown_tracing()
+
+
+def main(processes: int):
+    "Run consumers of order_processing_group, partitions are spread across processes"
+    if settings.METRICS_ENABLED:
+        if processes > 1 and not MULTIPROCESS:
+            logging.warning("Set PROMETHEUS_MULTIPROC_DIR to collect metrics of all consumer processes")
+        serve_metrics(settings.METRICS_PORT)
+    if processes <= 1:
+        start_consume()
+        return
+    workers = [
+        multiprocessing.Process(target=start_consume, name=f"kafka-consumer-{i}")
+        for i in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
 
 if __name__ == "__main__":
-    start_consume()
\ No newline at end of file
+    main(settings.KAFKA_CONSUMER_PROCESSES)
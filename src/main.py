@@ -5,31 +5,75 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 
 import contextlib
-from fastapi import FastAPI, status
-from fastapi_cache import FastAPICache, JsonCoder
-from fastapi_cache.backends.redis import RedisBackend
+from fastapi import FastAPI, Response, status
+from fastapi_cache import FastAPICache
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-from redis.asyncio import from_url
+from redis.asyncio import Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from src.api.deps import user_cache
 from src.api.endpoints.auth import auth_router
 from src.api.endpoints.orders import order_router
-from src.kafka.producer import shutdown_kafka
+from src.cache.backend import TwoTierBackend
 from src.core.limiter import limiter
 from src.core.config import settings
+from src.core.metrics import MetricsMiddleware, cache_stats, component_stats, render_metrics
+from src.core.redis_pool import close_pools, get_redis
+from src.core.tracing import TracingMiddleware, setup_tracing, shutdown_tracing, tracing_enabled
+from src.core.security import hashing_pool
+from src.core.tokens import get_keyring
+from src.db.session import dispose_engine, init_engine
+
+
+async def warm_up(engine: AsyncEngine, redis: Redis):
+    "Open the first database and Redis connections before the worker takes traffic"
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        await redis.ping()
+    except Exception:
+        logging.exception("Warm-up failed, the first requests will open connections")
 
 
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Lifespan context manager for FastAPI app.
+    Clients are created here, per worker process, rather than at import.
+    The cache, its invalidation listener and the rate limiter share one Redis
+    connection pool per URL.
     """
-    redis = from_url(settings.FASTAPI_CACHE_REDIS_URL)
-    FastAPICache.init(RedisBackend(redis), coder=JsonCoder)
+    setup_tracing("api")
+    # Fails on a bad key configuration now instead of on the first login
+    get_keyring()
+    engine = init_engine()
+    redis = get_redis(settings.FASTAPI_CACHE_REDIS_URL)
+    cache_backend = TwoTierBackend(
+        redis,
+        maxsize=settings.CACHE_L1_MAXSIZE,
+        ttl=settings.CACHE_L1_TTL,
+        max_item_bytes=settings.CACHE_L1_MAX_ITEM_BYTES,
+        channel=settings.CACHE_INVALIDATION_CHANNEL,
+    )
+    FastAPICache.init(cache_backend)
+    await cache_backend.start_listener()
+    cache_stats.add("auth", user_cache.stats)
+    cache_stats.add("l1", cache_backend.l1.stats)
+    cache_stats.add("l2", lambda: cache_backend.stats()["l2"])
+    component_stats.add("database_pool", lambda: {
+        "checked_out": engine.pool.checkedout(),
+        "overflow": engine.pool.overflow(),
+    })
+    component_stats.add("password_hashing", hashing_pool.stats)
+    component_stats.add("rate_limiter", limiter.stats)
+    await warm_up(engine, redis)
     yield
-    await redis.close()
-    shutdown_kafka()
+    await cache_backend.close()
+    await limiter.close()
+    await close_pools()
+    await dispose_engine()
+    hashing_pool.shutdown()
+    shutdown_tracing()
 
 
 API_TITLE = "Order Management Service"
@@ -39,9 +83,9 @@ Provides API endpoints for managing user orders.
 Features:
 - **User Authentication**: JWT-based authentication (Register and Login).
 - **Order Management**: Create, retrieve, update orders.
-- **Asynchronous Operations**: Uses Kafka for notifying about new orders.
+- **Asynchronous Operations**: Uses a transactional outbox relayed to Kafka for notifying about new orders.
 - **Caching**: Caches order details using Redis for faster retrieval.
-- **Rate Limiting**: Protects API endpoints from abuse.
+- **Rate Limiting**: Per-user (or per-IP) token buckets in Redis, with separate limits for auth, reads and writes.
 """
 API_VERSION = "0.1.0"
 
@@ -54,7 +98,7 @@ common_responses = {
     },
     status.HTTP_404_NOT_FOUND: {"description": "Resource not found"},
     status.HTTP_429_TOO_MANY_REQUESTS: {
-        "description": "Rate limit exceeded (1 per second)",
+        "description": "Rate limit exceeded, retry after the Retry-After header",
     },
 }
 
@@ -62,9 +106,6 @@ app = FastAPI(
     title=API_TITLE, description=API_DESCRIPTION, version=API_VERSION, lifespan=lifespan
 )
 
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 app.include_router(
     auth_router,
     tags=["Authentication"],
@@ -91,6 +132,13 @@ app.include_router(
     },
 )
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        "Prometheus metrics"
+        body, content_type = render_metrics()
+        return Response(content=body, media_type=content_type)
+
 allowed_origins = ["http://localhost:3000", "http://127.0.0.1:3000"]
 
 app.add_middleware(
@@ -101,4 +149,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_middleware(SlowAPIMiddleware)
+if tracing_enabled():
+    app.add_middleware(TracingMiddleware)
+
+if settings.METRICS_ENABLED:
+    # Added last so the timing covers the other middlewares too
+    app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,30 @@
+"""Add user roles
+
+Revision ID: 12b64a0e728e
+Revises: b72891253dab
+Create Date: 2026-10-17 21:02:11.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '12b64a0e728e'
+down_revision: Union[str, None] = 'b72891253dab'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default is stored in the catalog, existing rows are not rewritten
+    op.add_column('users', sa.Column('roles', postgresql.ARRAY(sa.String()), server_default=sa.text("'{user}'"), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'roles')
@@ -0,0 +1,43 @@
+"""Drop orders status index
+
+Revision ID: 3b934116d11c
+Revises: 12b64a0e728e
+Create Date: 2026-10-17 23:41:52.604183
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b934116d11c'
+down_revision: Union[str, None] = '12b64a0e728e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # No query filters orders by status across users, and the index keeps status updates from being HOT
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_orders_status_created_at',
+            table_name='orders',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_status_created_at',
+            'orders',
+            ['status', 'created_at'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
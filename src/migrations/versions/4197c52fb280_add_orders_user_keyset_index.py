@@ -0,0 +1,43 @@
+"""Add orders user keyset index
+
+Revision ID: 4197c52fb280
+Revises: 936d256615b5
+Create Date: 2026-10-17 10:12:41.528914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4197c52fb280'
+down_revision: Union[str, None] = '936d256615b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_user_id_created_at_id',
+            'orders',
+            ['user_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_orders_user_id_created_at_id',
+            table_name='orders',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
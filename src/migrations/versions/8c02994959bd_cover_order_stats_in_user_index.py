@@ -0,0 +1,58 @@
+"""Cover order stats in user index
+
+Revision ID: 8c02994959bd
+Revises: 9153828fe7f5
+Create Date: 2026-10-17 15:02:44.618027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c02994959bd'
+down_revision: Union[str, None] = '9153828fe7f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_user_id_created_at_id_stats',
+            'orders',
+            ['user_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_include=['status', 'total_price'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_orders_user_id_created_at_id',
+            table_name='orders',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_user_id_created_at_id',
+            'orders',
+            ['user_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_orders_user_id_created_at_id_stats',
+            table_name='orders',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,150 @@
+"""Type order items and totals
+
+Revision ID: 9153828fe7f5
+Revises: d657a181b9c7
+Create Date: 2026-10-17 14:21:07.384512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9153828fe7f5'
+down_revision: Union[str, None] = 'd657a181b9c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_BATCH_SIZE = 5000
+MAX_TOTAL_PRICE = '9999999999.99'
+
+# Items created before they were typed have no sku, fall back to the item name
+TYPED_ITEMS_FUNCTION = """
+CREATE OR REPLACE FUNCTION orders_typed_items(items jsonb) RETURNS jsonb
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+        WHEN jsonb_typeof(items) = 'array' AND jsonb_array_length(items) > 0 THEN (
+            SELECT jsonb_agg(
+                CASE WHEN item ? 'sku' THEN item
+                     ELSE item || jsonb_build_object('sku', coalesce(item->>'name', ''))
+                END
+                ORDER BY position
+            )
+            FROM jsonb_array_elements(items) WITH ORDINALITY AS elements(item, position)
+        )
+        ELSE items
+    END
+$$
+"""
+
+# Keeps the typed columns current for rows written while the backfill runs
+SYNC_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION orders_sync_typed_columns() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.items_typed := orders_typed_items(NEW.items::jsonb);
+    NEW.total_price_typed := round(NEW.total_price::numeric, 2);
+    RETURN NEW;
+END
+$$
+"""
+
+BACKFILL = """
+WITH batch AS (
+    SELECT id FROM orders WHERE id > :after ORDER BY id LIMIT :batch_size
+)
+UPDATE orders
+SET items_typed = orders_typed_items(orders.items::jsonb),
+    total_price_typed = round(orders.total_price::numeric, 2)
+FROM batch
+WHERE orders.id = batch.id
+RETURNING orders.id
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Changing the column types in place would rewrite orders under an ACCESS EXCLUSIVE
+    # lock. Typed copies are filled in batches instead and swapped in at the end.
+    bind = op.get_bind()
+    out_of_range = bind.execute(sa.text(
+        "SELECT id FROM orders WHERE NOT (abs(total_price) < :limit + 0.005) LIMIT 10"
+    ), {'limit': float(MAX_TOTAL_PRICE)}).scalars().all()
+    if out_of_range:
+        raise RuntimeError(
+            f"Orders {', '.join(map(str, out_of_range))} have a total_price that does not fit "
+            f"NUMERIC(12, 2) (at most {MAX_TOTAL_PRICE}), correct them before upgrading"
+        )
+    # Every step can run again if the migration is interrupted
+    op.execute("ALTER TABLE orders ADD COLUMN IF NOT EXISTS items_typed JSONB, "
+               "ADD COLUMN IF NOT EXISTS total_price_typed NUMERIC(12, 2)")
+    op.execute(TYPED_ITEMS_FUNCTION)
+    op.execute(SYNC_TRIGGER_FUNCTION)
+    op.execute("DROP TRIGGER IF EXISTS orders_sync_typed_columns ON orders")
+    op.execute("CREATE TRIGGER orders_sync_typed_columns BEFORE INSERT OR UPDATE ON orders "
+               "FOR EACH ROW EXECUTE FUNCTION orders_sync_typed_columns()")
+    # One short transaction per batch, so no lock is held for long
+    with op.get_context().autocommit_block():
+        after = '00000000-0000-0000-0000-000000000000'
+        while True:
+            ids = bind.execute(
+                sa.text(BACKFILL), {'after': after, 'batch_size': BACKFILL_BATCH_SIZE}
+            ).scalars().all()
+            if not ids:
+                break
+            after = str(max(ids))
+        # A validated check lets SET NOT NULL skip scanning the table
+        for column in ('items_typed', 'total_price_typed'):
+            op.execute(f"ALTER TABLE orders DROP CONSTRAINT IF EXISTS ck_orders_{column}_not_null")
+            op.execute(f"ALTER TABLE orders ADD CONSTRAINT ck_orders_{column}_not_null "
+                       f"CHECK ({column} IS NOT NULL) NOT VALID")
+            op.execute(f"ALTER TABLE orders VALIDATE CONSTRAINT ck_orders_{column}_not_null")
+    # The swap only changes the catalog, no index covers the old columns yet
+    op.execute("SET LOCAL lock_timeout = '10s'")
+    op.execute("DROP TRIGGER orders_sync_typed_columns ON orders")
+    op.execute("ALTER TABLE orders DROP COLUMN items, DROP COLUMN total_price")
+    op.execute("ALTER TABLE orders RENAME COLUMN items_typed TO items")
+    op.execute("ALTER TABLE orders RENAME COLUMN total_price_typed TO total_price")
+    op.execute("ALTER TABLE orders ALTER COLUMN items SET NOT NULL, ALTER COLUMN total_price SET NOT NULL")
+    op.execute("ALTER TABLE orders DROP CONSTRAINT ck_orders_items_typed_not_null, "
+               "DROP CONSTRAINT ck_orders_total_price_typed_not_null")
+    op.execute("DROP FUNCTION orders_sync_typed_columns()")
+    op.execute("DROP FUNCTION orders_typed_items(jsonb)")
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_items',
+            'orders',
+            ['items'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'items': 'jsonb_path_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Rewrites orders under an ACCESS EXCLUSIVE lock, run it in a maintenance window
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_orders_items',
+            table_name='orders',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.alter_column('orders', 'total_price',
+               existing_type=sa.Numeric(12, 2),
+               type_=sa.Float(),
+               existing_nullable=False,
+               postgresql_using='total_price::double precision')
+    op.alter_column('orders', 'items',
+               existing_type=postgresql.JSONB(),
+               type_=sa.JSON(),
+               existing_nullable=False,
+               postgresql_using='items::json')
@@ -0,0 +1,50 @@
+"""Add orders status indexes
+
+Revision ID: c1ad84b390a6
+Revises: 4197c52fb280
+Create Date: 2026-10-17 11:03:19.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1ad84b390a6'
+down_revision: Union[str, None] = '4197c52fb280'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_orders_user_id_status_created_at': ['user_id', 'status', 'created_at'],
+    'ix_orders_status_created_at': ['status', 'created_at'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(
+                name,
+                'orders',
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(
+                name,
+                table_name='orders',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,34 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import asyncio
+import logging
+from src.core.config import settings
+from src.core.metrics import component_stats, serve_metrics
+from src.core.tracing import setup_tracing, shutdown_tracing
+from src.db.session import SessionLocal, dispose_engine, init_engine
+from src.kafka.outbox import run_relay
+from src.kafka.producer import producer_service, shutdown_kafka
+
+logging.basicConfig(level=logging.INFO)
+
+
+async def start_relay():
+    setup_tracing("outbox-relay")
+    init_engine()
+    if settings.METRICS_ENABLED:
+        component_stats.add("kafka_producer", producer_service.stats)
+        serve_metrics(settings.METRICS_PORT)
+    try:
+        await run_relay(
+            SessionLocal,
+            batch_size=settings.OUTBOX_BATCH_SIZE,
+            poll_interval=settings.OUTBOX_POLL_INTERVAL,
+        )
+    finally:
+        await dispose_engine()
+        shutdown_kafka()
+        shutdown_tracing()
+
+if __name__ == "__main__":
+    asyncio.run(start_relay())
@@ -1,8 +1,19 @@
 import uuid
 import enum
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 from typing import Any, Dict, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+
+# Largest value orders.total_price, a Numeric(12, 2), can hold
+MAX_TOTAL_PRICE = Decimal("9999999999.99")
+CENT = Decimal("0.01")
+
+
+def items_total(items: List["OrderItem"]) -> Decimal:
+    "Total price of items, at the scale it is stored with"
+    return sum((item.price * item.quantity for item in items), Decimal("0")).quantize(CENT)
 
 
 class OrderStatus(str, enum.Enum):
@@ -14,23 +25,53 @@ class OrderStatus(str, enum.Enum):
     CANCELED = "CANCELED"
 
 
+class SortOrder(str, enum.Enum):
+    "Enumeration for the direction of order listings by creation time."
+
+    ASC = "asc"
+    DESC = "desc"
+
+
+class OrderItem(BaseModel):
+    "Schema for one line item of an order."
+
+    sku: str = Field(
+        ..., min_length=1, max_length=64, description="Stock keeping unit of the product.", example="XBOX-SX"
+    )
+    name: str = Field(..., min_length=1, description="Product name.", example="xbox")
+    quantity: int = Field(..., gt=0, description="Number of units ordered.", example=2)
+    price: Decimal = Field(
+        ..., gt=0, max_digits=12, decimal_places=2, description="Price of one unit.", example="15.50"
+    )
+
+
 class OrderBase(BaseModel):
     "Base schema for order data, used for creation."
 
-    items: List[Dict[str, Any]] = Field(
+    items: List[OrderItem] = Field(
         ...,
-        description="List of items included in the order. Each item should be a dictionary.",
+        min_length=1,
+        description="List of items included in the order.",
         example=[
-            {"name": "xbox", "quantity": 2, "price": 15.50},
-            {"name": "ps5", "quantity": 1, "price": 42.0},
+            {"sku": "XBOX-SX", "name": "xbox", "quantity": 2, "price": "15.50"},
+            {"sku": "PS5-STD", "name": "ps5", "quantity": 1, "price": "42.00"},
         ],
     )
-    total_price: float = Field(
-        ...,
-        gt=0,
-        description="The total calculated price for all items in the order.",
-        example=73.00,
-    )
+
+    @field_validator("items")
+    @classmethod
+    def check_total(cls, items: List[OrderItem]) -> List[OrderItem]:
+        "Reject orders whose total would overflow the total_price column."
+        if items_total(items) > MAX_TOTAL_PRICE:
+            raise ValueError(f"Order total must not exceed {MAX_TOTAL_PRICE}")
+        return items
+
+    def to_row(self) -> dict:
+        "Column values of a new order, with the total computed from the items."
+        return {
+            "items": [item.model_dump(mode="json") for item in self.items],
+            "total_price": items_total(self.items),
+        }
 
 
 class OrderUpdate(BaseModel):
@@ -43,6 +84,16 @@ class OrderUpdate(BaseModel):
     )
 
 
+class OrderStatusUpdate(OrderUpdate):
+    "Schema for one item of a bulk status update."
+
+    id: uuid.UUID = Field(
+        ...,
+        description="Identifier of the order to update.",
+        example="f47ac10b-58cc-4372-a567-0e02b2c3d479",
+    )
+
+
 class OrderRead(OrderBase):
     "Schema representing a complete order record as read from the system."
 
@@ -54,6 +105,11 @@ class OrderRead(OrderBase):
     user_id: int = Field(
         ..., description="Identifier of the user who placed the order.", example=101
     )
+    total_price: Decimal = Field(
+        ...,
+        description="The total price of all items in the order, computed by the server.",
+        example="73.00",
+    )
     status: OrderStatus = Field(
         ..., description="The current status of the order.", example=OrderStatus.PENDING
     )
@@ -66,13 +122,57 @@ class OrderRead(OrderBase):
     class Config:
         from_attributes = True  # ORM mode for Pydantic v2
 
-    def dump_for_kafka(self) -> dict:
-        "Serializes order data for Kafka message payload."
-        return {
-            "id": str(self.id),  # Kafka might prefer string UUID
-            "user_id": self.user_id,
-            "items": self.items,
-            "total_price": self.total_price,
-            "status": self.status.value,  # Send enum value
-            "created_at": self.created_at.isoformat(),  # Use ISO format string
-        }
+
+class OrderFilter(BaseModel):
+    "Schema for the filters of user order listings and stats."
+
+    status: List[OrderStatus] | None = Field(None, description="Only orders in one of these statuses.")
+    created_from: datetime | None = Field(None, description="Only orders created at or after this time.")
+    created_to: datetime | None = Field(None, description="Only orders created before this time.")
+    sku: str | None = Field(None, description="Only orders containing an item with this SKU.")
+
+
+class OrderPage(BaseModel):
+    "Schema for one keyset-paginated page of orders."
+
+    items: List[OrderRead] = Field(..., description="Orders on this page, in the requested order.")
+    next_cursor: str | None = Field(
+        None,
+        description="Cursor for the next page, null when this is the last page.",
+        example="MjAyMy0xMC0yN1QxMjozMDowMHxmNDdhYzEwYi01OGNjLTQzNzItYTU2Ny0wZTAyYjJjM2Q0Nzk",
+    )
+
+
+class OrderStatusStats(BaseModel):
+    "Schema for the number and value of orders in one status."
+
+    status: OrderStatus = Field(..., description="Status of the orders.", example=OrderStatus.PAID)
+    count: int = Field(..., description="Number of orders.", example=12)
+    total_price: Decimal = Field(..., description="Sum of the order totals.", example="876.00")
+
+
+class OrderDayStats(BaseModel):
+    "Schema for the number and value of orders created on one UTC day."
+
+    day: date = Field(..., description="UTC day the orders were created on.", example="2023-10-27")
+    count: int = Field(..., description="Number of orders.", example=3)
+    total_price: Decimal = Field(..., description="Sum of the order totals.", example="219.00")
+
+
+class OrderStats(BaseModel):
+    "Schema for aggregated orders of a user."
+
+    count: int = Field(..., description="Number of matching orders.", example=12)
+    total_price: Decimal = Field(..., description="Sum of the matching order totals.", example="876.00")
+    by_status: List[OrderStatusStats] = Field(..., description="Totals per status.")
+    by_day: List[OrderDayStats] = Field(..., description="Totals per UTC day, oldest first.")
+
+
+class BulkOrderResult(BaseModel):
+    "Schema for the outcome of one item of a bulk order creation."
+
+    index: int = Field(..., description="Position of the item in the request.", example=0)
+    order: OrderRead | None = Field(None, description="The created order, null if the item was invalid.")
+    errors: List[Dict[str, Any]] | None = Field(
+        None, description="Validation errors of the item, null if it was created."
+    )
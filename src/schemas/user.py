@@ -13,4 +13,8 @@ class UserRead(UserBase):
     id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class CurrentUser(UserRead):
+    "Authenticated user, built from the access token claims"
+    roles: list[str] = []
\ No newline at end of file
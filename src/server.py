@@ -0,0 +1,46 @@
+"""
+Production entry point of the API: uvicorn with several worker processes.
+
+Every worker imports src.main on its own and creates its clients in the app
+lifespan. On SIGTERM/SIGINT workers stop accepting connections, let
+in-flight requests finish for up to API_GRACEFUL_SHUTDOWN_TIMEOUT seconds
+and then run the lifespan shutdown.
+
+Usage:
+    python -m src.server
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+import logging
+import os
+import tempfile
+import uvicorn
+from src.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    workers = max(1, settings.API_WORKERS)
+    if workers > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        # Inherited by the workers so /metrics of any of them reports all of them
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+    logging.info(f"Starting {workers} API workers on {settings.API_HOST}:{settings.API_PORT}")
+    # The app is passed by import string so the supervisor itself never imports it
+    uvicorn.run(
+        "src.main:app",
+        host=settings.API_HOST,
+        port=settings.API_PORT,
+        workers=workers,
+        loop=settings.API_LOOP,
+        http=settings.API_HTTP,
+        backlog=settings.API_BACKLOG,
+        timeout_keep_alive=settings.API_KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=settings.API_GRACEFUL_SHUTDOWN_TIMEOUT,
+        access_log=settings.API_ACCESS_LOG,
+    )
+
+
+if __name__ == "__main__":
+    main()
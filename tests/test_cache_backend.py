@@ -0,0 +1,94 @@
+import asyncio
+import fakeredis
+import pytest
+from src.cache.backend import TwoTierBackend
+
+CHANNEL = "cache-invalidation"
+
+
+@pytest.fixture
+async def replicas(redis_server):
+    "Two replicas of the API sharing one Redis, each with its own L1 and listener"
+    backends = [
+        TwoTierBackend(
+            fakeredis.FakeAsyncRedis(server=redis_server), maxsize=100, ttl=60, max_item_bytes=1024, channel=CHANNEL
+        )
+        for _ in range(2)
+    ]
+    for backend in backends:
+        await backend.start_listener()
+    redis = backends[0].redis
+    for _ in range(100):
+        if dict(await redis.pubsub_numsub(CHANNEL)).get(CHANNEL.encode()) == len(backends):
+            break
+        await asyncio.sleep(0.01)
+    yield backends
+    for backend in backends:
+        await backend.close()
+        await backend.redis.close()
+
+
+async def wait_for(condition, timeout: float = 2.0) -> bool:
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return True
+        await asyncio.sleep(0.01)
+    return condition()
+
+
+async def test_l2_hit_is_kept_in_l1(redis):
+    backend = TwoTierBackend(redis, maxsize=100, ttl=60, max_item_bytes=1024, channel=CHANNEL)
+    await redis.set("key", b"value", ex=30)
+    ttl, value = await backend.get_with_ttl("key")
+    assert (ttl, value) == (30, b"value")
+    await redis.delete("key")
+    assert await backend.get("key") == b"value"
+    assert backend.stats()["l2"]["hits"] == 1
+
+
+async def test_large_values_skip_l1(redis):
+    backend = TwoTierBackend(redis, maxsize=100, ttl=60, max_item_bytes=4, channel=CHANNEL)
+    await backend.set("key", b"too large", expire=30)
+    assert backend.l1.get("key") is None
+    assert await backend.get("key") == b"too large"
+
+
+async def test_get_many_reads_misses_with_one_mget(redis):
+    backend = TwoTierBackend(redis, maxsize=100, ttl=60, max_item_bytes=1024, channel=CHANNEL)
+    await backend.set("a", b"1", expire=30)
+    await redis.set("b", b"2")
+    assert await backend.get_many(["a", "b", "c"]) == {"a": b"1", "b": b"2"}
+    assert backend.stats()["l2"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+async def test_invalidate_drops_l1_copies_on_other_replicas(replicas):
+    writer, reader = replicas
+    await writer.set("key", b"old", expire=30)
+    assert await reader.get("key") == b"old"
+    await writer.invalidate("key")
+    assert await wait_for(lambda: reader.l1.get("key") is None)
+    assert await reader.get("key") is None
+
+
+async def test_published_invalidation_drops_l1_copies_on_other_replicas(replicas):
+    writer, reader = replicas
+    await writer.set("key", b"old", expire=30)
+    assert await reader.get("key") == b"old"
+    await writer.set("key", b"new", expire=30)
+    await writer.publish_invalidation("key")
+    assert await wait_for(lambda: reader.l1.get("key") is None)
+    assert await reader.get("key") == b"new"
+    # The writer ignores its own invalidation
+    await asyncio.sleep(0.05)
+    assert writer.l1.get("key")[1] == b"new"
+
+
+async def test_broadcast_write_drops_l1_copies_on_other_replicas(replicas):
+    writer, reader = replicas
+    await writer.set("key", b"old", expire=30)
+    assert await reader.get("key") == b"old"
+    await writer.set_many({"key": b"new"}, expire=30, broadcast=True)
+    assert await wait_for(lambda: reader.l1.get("key") is None)
+    assert await reader.get("key") == b"new"
+    await asyncio.sleep(0.05)
+    assert writer.l1.get("key")[1] == b"new"
@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from redis.exceptions import ConnectionError
+from src.core.limiter import TOKEN_BUCKET_SCRIPT, TokenBucketLimiter, retry_after_header
+
+
+def make_limiter(redis, local_batch: int = 1) -> TokenBucketLimiter:
+    limiter = TokenBucketLimiter("redis://unused", local_batch=local_batch, local_ttl=1.0, local_maxsize=100)
+    limiter._redis = redis
+    limiter._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+    return limiter
+
+
+async def test_burst_is_allowed_then_rejected(redis):
+    limiter = make_limiter(redis)
+    for _ in range(3):
+        assert await limiter.acquire("user:1", rate=1, burst=3) == 0
+    retry_after = await limiter.acquire("user:1", rate=1, burst=3)
+    assert 0 < retry_after <= 1
+    assert limiter.stats()["allowed"] == 3
+    assert limiter.stats()["rejected"] == 1
+
+
+async def test_buckets_are_per_key(redis):
+    limiter = make_limiter(redis)
+    assert await limiter.acquire("user:1", rate=1, burst=1) == 0
+    assert await limiter.acquire("user:1", rate=1, burst=1) > 0
+    assert await limiter.acquire("user:2", rate=1, burst=1) == 0
+
+
+async def test_bucket_refills_at_rate(redis):
+    limiter = make_limiter(redis)
+    assert await limiter.acquire("user:1", rate=20, burst=1) == 0
+    retry_after = await limiter.acquire("user:1", rate=20, burst=1)
+    assert 0 < retry_after <= 0.05
+    # The rejection is remembered locally until the bucket can refill
+    assert limiter.stats()["round_trips"] == 2
+    await asyncio.sleep(retry_after + 0.02)
+    assert await limiter.acquire("user:1", rate=20, burst=1) == 0
+
+
+async def test_bucket_expires_once_full_again(redis):
+    limiter = make_limiter(redis)
+    await limiter.acquire("user:1", rate=10, burst=5)
+    ttl = await redis.pttl("ratelimit:user:1")
+    assert 0 < ttl <= 100 + 1000
+
+
+async def test_local_batch_spends_tokens_without_round_trips(redis):
+    limiter = make_limiter(redis, local_batch=5)
+    for _ in range(5):
+        assert await limiter.acquire("user:1", rate=1, burst=10) == 0
+    assert limiter.stats()["round_trips"] == 1
+    tokens = float(await redis.hget("ratelimit:user:1", "tokens"))
+    assert tokens == pytest.approx(5, abs=0.1)
+
+
+async def test_local_batch_never_exceeds_burst(redis):
+    limiter = make_limiter(redis, local_batch=5)
+    for _ in range(2):
+        assert await limiter.acquire("user:1", rate=1, burst=2) == 0
+    assert await limiter.acquire("user:1", rate=1, burst=2) > 0
+
+
+async def test_redis_errors_fail_open(redis):
+    limiter = make_limiter(redis)
+
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("down")
+
+    limiter._script = unavailable
+    assert await limiter.acquire("user:1", rate=1, burst=1) == 0
+    assert limiter.stats()["errors"] == 1
+
+
+async def test_disabled_limiter_allows_everything(redis):
+    limiter = make_limiter(redis)
+    limiter.enabled = False
+    for _ in range(3):
+        assert await limiter.acquire("user:1", rate=1, burst=1) == 0
+    assert limiter.stats()["round_trips"] == 0
+
+
+def test_retry_after_header_rounds_up():
+    assert retry_after_header(0.01) == {"Retry-After": "1"}
+    assert retry_after_header(2.5) == {"Retry-After": "3"}
@@ -0,0 +1,63 @@
+import pytest
+from src.cache import lru
+from src.cache.lru import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    "Monotonic clock of the cache module, advanced by hand"
+    now = [1000.0]
+    monkeypatch.setattr(lru.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entry_expires_after_its_ttl(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1, ttl=5)
+    clock[0] += 4.9
+    assert cache.get("a") == 1
+    clock[0] += 0.1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_is_capped_by_the_cache_ttl(clock):
+    cache = TTLCache(maxsize=10, ttl=10)
+    cache.set("a", 1, ttl=3600)
+    clock[0] += 9.9
+    assert cache.get("a") == 1
+    clock[0] += 0.1
+    assert cache.get("a") is None
+
+
+def test_non_positive_ttl_is_not_stored(clock):
+    cache = TTLCache(maxsize=10, ttl=10)
+    cache.set("a", 1, ttl=0)
+    cache.set("b", 1, ttl=-1)
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_peek_leaves_counters_and_recency_alone(clock):
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.peek("a") == 1
+    assert cache.peek("missing", "default") == "default"
+    assert cache.stats()["hits"] == 0
+    assert cache.stats()["misses"] == 0
+    # "a" is still the oldest entry
+    cache.set("c", 3)
+    assert cache.peek("a") is None
+    clock[0] += 10
+    assert cache.peek("b") is None
@@ -0,0 +1,185 @@
+import asyncio
+import uuid
+import pytest
+from src.cache import orders
+from src.cache.backend import TwoTierBackend
+from src.cache.orders import OrderCache, order_cache_key, pack_entry
+from src.core.encoding import EncodedOrder
+
+
+def make_cache(redis, lock_wait: float = 1.0) -> OrderCache:
+    backend = TwoTierBackend(redis, maxsize=100, ttl=60, max_item_bytes=4096, channel="cache-invalidation")
+    return OrderCache(ttl=60, xfetch_beta=1.0, lock_ttl=5, lock_wait=lock_wait, backend=backend)
+
+
+def make_order(user_id: int = 1) -> EncodedOrder:
+    order_id = uuid.uuid4()
+    return EncodedOrder(order_id, user_id, f'{{"id":"{order_id}"}}'.encode())
+
+
+def renewed(order: EncodedOrder) -> EncodedOrder:
+    "The same order as loaded again after a change"
+    return order._replace(body=order.body[:-1] + b',"status":"PAID"}')
+
+
+def cache_entry(order: EncodedOrder, delta: float) -> bytes:
+    return pack_entry(order, delta)
+
+class Loader:
+    "Loader that counts its calls and takes delay seconds"
+
+    def __init__(self, order, delay: float = 0.05):
+        self.order = order
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.order
+
+
+@pytest.fixture
+def random_value(monkeypatch):
+    "Value returned by random.random() in the XFetch check"
+    value = [0.0]
+    monkeypatch.setattr(orders.random, "random", lambda: value[0])
+    return value
+
+
+def test_refresh_early_needs_a_ttl_and_a_load_time(redis, random_value):
+    cache = make_cache(redis)
+    random_value[0] = 0.999999
+    assert not cache._refresh_early(-1, 0.5)
+    assert not cache._refresh_early(30, 0.0)
+    assert cache._refresh_early(30, 5.0)
+
+
+def test_refresh_early_is_likelier_close_to_expiry(redis, random_value):
+    cache = make_cache(redis)
+    # -delta * beta * log(1 - 0.5) = 0.069 for delta 0.1
+    random_value[0] = 0.5
+    assert not cache._refresh_early(1, 0.1)
+    assert cache._refresh_early(0.05, 0.1)
+    random_value[0] = 0.0
+    assert not cache._refresh_early(0.05, 0.1)
+
+
+async def test_concurrent_misses_share_one_load(redis):
+    cache = make_cache(redis)
+    order = make_order()
+    loader = Loader(order)
+    results = await asyncio.gather(*(cache.get_or_load(order.id, loader) for _ in range(10)))
+    assert results == [order] * 10
+    assert loader.calls == 1
+    assert await cache.get_or_load(order.id, loader) == order
+    assert loader.calls == 1
+    assert await redis.get(f"lock:{order_cache_key(order.id)}") is None
+
+
+async def test_missing_order_is_not_cached(redis):
+    cache = make_cache(redis)
+    order_id = uuid.uuid4()
+    loader = Loader(None)
+    assert await cache.get_or_load(order_id, loader) is None
+    assert await cache.get_or_load(order_id, loader) is None
+    assert loader.calls == 2
+
+
+async def test_waits_for_the_lock_holder_of_another_process(redis):
+    cache = make_cache(redis)
+    order = make_order()
+    key = order_cache_key(order.id)
+    await redis.set(f"lock:{key}", "other", px=5000)
+    loader = Loader(order)
+
+    async def other_process():
+        await asyncio.sleep(0.05)
+        await redis.set(key, cache_entry(order, 0.01), ex=60)
+
+    result, _ = await asyncio.gather(cache.get_or_load(order.id, loader), other_process())
+    assert result == order
+    assert loader.calls == 0
+
+
+async def test_loads_itself_when_the_lock_holder_is_too_slow(redis):
+    cache = make_cache(redis, lock_wait=0.1)
+    order = make_order()
+    await redis.set(f"lock:{order_cache_key(order.id)}", "other", px=5000)
+    loader = Loader(order, delay=0)
+    assert await cache.get_or_load(order.id, loader) == order
+    assert loader.calls == 1
+
+
+async def test_early_refresh_renews_the_entry(redis, random_value):
+    cache = make_cache(redis)
+    stale = make_order()
+    fresh = renewed(stale)
+    await cache.set(stale, delta=5.0)
+    random_value[0] = 0.999999
+    loader = Loader(fresh, delay=0)
+    assert await cache.get_or_load(stale.id, loader) == fresh
+    assert loader.calls == 1
+    assert await cache.get(stale.id) == fresh
+
+
+async def test_early_refresh_serves_stale_while_another_process_renews(redis, random_value):
+    cache = make_cache(redis)
+    stale = make_order()
+    await cache.set(stale, delta=5.0)
+    await redis.set(f"lock:{order_cache_key(stale.id)}", "other", px=5000)
+    random_value[0] = 0.999999
+    loader = Loader(renewed(stale), delay=0)
+    assert await cache.get_or_load(stale.id, loader) == stale
+    assert loader.calls == 0
+
+
+@pytest.fixture
+def unreachable(redis_server):
+    "Make every command of the redis fixture fail with ConnectionError"
+    redis_server.connected = False
+
+
+async def test_writes_are_best_effort(redis, unreachable):
+    cache = make_cache(redis)
+    order = make_order()
+    await cache.set(order)
+    await cache.set(order, broadcast=True)
+    await cache.set_many([order], broadcast=True)
+    await cache.invalidate(order.id)
+
+
+async def test_reads_fall_back_to_the_loader(redis, unreachable):
+    cache = make_cache(redis)
+    order = make_order()
+    loader = Loader(order)
+    results = await asyncio.gather(*(cache.get_or_load(order.id, loader) for _ in range(5)))
+    assert results == [order] * 5
+    assert loader.calls == 1
+    assert await cache.get_many([order.id]) == {}
+
+
+async def test_waiting_for_a_lock_holder_falls_back_to_the_loader(redis, redis_server):
+    cache = make_cache(redis)
+    order = make_order()
+    await redis.set(f"lock:{order_cache_key(order.id)}", "other", px=5000)
+    loader = Loader(order, delay=0)
+
+    async def redis_goes_down():
+        await asyncio.sleep(0.05)
+        redis_server.connected = False
+
+    result, _ = await asyncio.gather(cache.get_or_load(order.id, loader), redis_goes_down())
+    assert result == order
+    assert loader.calls == 1
+
+
+async def test_lock_release_errors_are_not_raised(redis, redis_server):
+    cache = make_cache(redis)
+    order = make_order()
+
+    async def loader():
+        redis_server.connected = False
+        return order
+
+    assert await cache.get_or_load(order.id, loader) == order
@@ -0,0 +1,33 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException
+from src.api.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 17, 12, 30, 5, 123456)
+    order_id = uuid.uuid4()
+    cursor = encode_cursor(created_at, order_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, order_id)
+
+
+def test_cursor_with_offset_is_normalised_to_naive_utc():
+    order_id = uuid.uuid4()
+    created_at = datetime(2026, 10, 17, 15, 30, tzinfo=timezone(timedelta(hours=3)))
+    assert decode_cursor(encode_cursor(created_at, order_id)) == (datetime(2026, 10, 17, 12, 30), order_id)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        encode_cursor(datetime(2026, 10, 17), uuid.uuid4())[:-4],
+        "bm8tc2VwYXJhdG9y",
+    ],
+)
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
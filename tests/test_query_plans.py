@@ -0,0 +1,143 @@
+"""
+Query-plan regression tests for the statements the API issues per request.
+
+Every statement is built by the query functions of orders.py and security.py
+and run through EXPLAIN with enable_seqscan off, so the planner only picks a
+sequential scan when no index can serve it. Needs a Postgres with migrations applied at
+DATABASE_URL and is skipped otherwise. Seeded rows are rolled back.
+"""
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from sqlalchemy import create_engine, insert, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from src.api.endpoints.orders import (
+    order_owner_query,
+    order_query,
+    orders_by_ids_query,
+    user_orders_query,
+    user_stats_query,
+)
+from src.api.pagination import encode_cursor
+from src.core.config import settings
+from src.core.security import user_by_email_query
+from src.db.models.order import Order
+from src.db.models.user import User
+from src.schemas.order import OrderFilter, OrderStatus, SortOrder
+
+SEED_ORDERS = 2000
+PAGE = 51
+
+
+class Explain(Executable, ClauseElement):
+    "EXPLAIN (FORMAT JSON) of a statement, with its parameters bound as usual"
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def seq_scans(plan: dict) -> list[str]:
+    "Relations read with a sequential scan anywhere in the plan tree"
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def seed(conn) -> tuple[int, str, list[uuid.UUID]]:
+    "Insert one user with SEED_ORDERS orders, returns its id, email and order ids"
+    email = f"explain-{uuid.uuid4().hex[:12]}@example.com"
+    user_id = conn.execute(
+        insert(User)
+        .values(email=email, hashed_password="x")
+        .returning(User.id)
+    ).scalar_one()
+    start = datetime.utcnow()
+    statuses = list(OrderStatus)
+    order_ids = [uuid.uuid4() for _ in range(SEED_ORDERS)]
+    conn.execute(
+        insert(Order),
+        [
+            {
+                "id": order_id,
+                "user_id": user_id,
+                "items": [{"sku": f"SKU-{i % 1000:06}", "name": "seed", "quantity": 1, "price": "1.00"}],
+                "total_price": Decimal("1.00"),
+                "status": statuses[i % len(statuses)],
+                "created_at": start - timedelta(seconds=i),
+            }
+            for i, order_id in enumerate(order_ids)
+        ],
+    )
+    conn.exec_driver_sql("ANALYZE users, orders")
+    return user_id, email, order_ids
+
+
+@pytest.fixture(scope="module")
+def conn():
+    "Connection in a transaction holding the seeded rows, rolled back at the end"
+    engine = create_engine(make_url(settings.DATABASE_URL).set(drivername="postgresql+psycopg2"))
+    try:
+        connection = engine.connect()
+    except OperationalError as e:
+        engine.dispose()
+        pytest.skip(f"Postgres is unavailable: {e.orig}")
+    if not inspect(connection).has_table(Order.__tablename__):
+        connection.close()
+        engine.dispose()
+        pytest.skip("Migrations are not applied")
+    transaction = connection.begin()
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    try:
+        yield connection
+    finally:
+        transaction.rollback()
+        connection.close()
+        engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def seeded(conn):
+    return seed(conn)
+
+
+def hot_queries(user_id: int, email: str, order_ids: list[uuid.UUID]) -> dict:
+    "Statements of the API, by endpoint and variant"
+    cursor = encode_cursor(datetime.utcnow() - timedelta(seconds=SEED_ORDERS // 2), uuid.uuid4())
+    end = datetime.utcnow()
+    start = end - timedelta(days=30)
+    return {
+        "authenticate_user and legacy get_current_user": user_by_email_query(email),
+        "get_order": order_query(order_ids[0]),
+        "update_order_status owner check": order_owner_query(order_ids[0]),
+        "get_orders_batch": orders_by_ids_query(order_ids[:100]),
+        "get_user_orders first page": user_orders_query(user_id).limit(PAGE),
+        "get_user_orders next page": user_orders_query(user_id, cursor).limit(PAGE),
+        "get_user_orders newest first": user_orders_query(user_id, cursor, sort=SortOrder.DESC).limit(PAGE),
+        "get_user_orders by status and range": user_orders_query(
+            user_id, filters=OrderFilter(status=[OrderStatus.PAID], created_from=start, created_to=end)
+        ).limit(PAGE),
+        "get_user_orders containing a sku": user_orders_query(
+            user_id, filters=OrderFilter(sku="SKU-000001")
+        ).limit(PAGE),
+        "get_user_order_stats": user_stats_query(user_id, OrderFilter(created_from=start, created_to=end)),
+    }
+
+
+@pytest.mark.parametrize("name", list(hot_queries(1, "", [uuid.uuid4()])))
+def test_hot_query_uses_an_index(conn, seeded, name):
+    plan = conn.execute(Explain(hot_queries(*seeded)[name])).scalar_one()[0]["Plan"]
+    assert not seq_scans(plan), f"{name} reads {', '.join(seq_scans(plan))} with a sequential scan"